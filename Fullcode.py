@@ -178,10 +178,10 @@ class StudyGuardController:
         self.frame_buffer.clear()
 
     def _visualize_data(self, frame):
-        for roll_no, data in self.student_tracker.items():
+        for position, (roll_no, data) in enumerate(self.student_tracker.items()):
             if data['present']:
                 text = f"{data['metadata']['name']} ({roll_no}) - Present"
-                cv2.putText(frame, text, (10, 30 + 20 * list(self.student_tracker.keys()).index(roll_no)),
+                cv2.putText(frame, text, (10, 30 + 20 * position),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
         return frame
 
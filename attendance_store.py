@@ -0,0 +1,235 @@
+import argparse
+import os
+import sqlite3
+import time
+
+# --- Constants ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+ATTENDANCE_DB = os.path.join(script_dir, 'attendance.db')
+BUSY_TIMEOUT = 30.0  # Seconds a writer waits for another session (e.g. a parallel --batch job) to commit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    date TEXT NOT NULL,
+    ended_at TEXT NOT NULL,
+    room TEXT
+);
+CREATE TABLE IF NOT EXISTS session_electives (
+    session_id INTEGER NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    elective TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (session_id, elective)
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    session_id INTEGER NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    roll_no TEXT NOT NULL,
+    name TEXT NOT NULL,
+    elective TEXT NOT NULL,
+    date TEXT NOT NULL,
+    entry_time TEXT NOT NULL,
+    seconds_present INTEGER NOT NULL,
+    behaviors TEXT NOT NULL,
+    PRIMARY KEY (session_id, roll_no)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_date ON sessions (date);
+CREATE INDEX IF NOT EXISTS session_electives_by_elective ON session_electives (elective, date);
+-- The attendance indexes cover every column the aggregates read, so queries never touch the table itself
+CREATE INDEX IF NOT EXISTS attendance_by_date ON attendance (date, elective, roll_no, session_id, seconds_present);
+CREATE INDEX IF NOT EXISTS attendance_by_elective ON attendance (elective, date, roll_no, session_id, seconds_present);
+CREATE INDEX IF NOT EXISTS attendance_by_student ON attendance (roll_no, elective, date, session_id, seconds_present,
+                                                                name);
+"""
+
+
+class AttendanceStore:
+    """
+    SQLite database of every session's attendance, indexed by date, elective and roll
+    number, so multi-session aggregates need no report CSVs to be loaded.
+
+    A session counts as held for the electives expected in it (from the timetable or
+    --electives) or, when those are unknown, for the electives of the students who came.
+    A student's attendance percentage is the share of their elective's sessions they
+    attended; students who never attended a session have no rows.
+    """
+    def __init__(self, path=ATTENDANCE_DB):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record_session(self, name, session_end, student_data, electives=None, room=None):
+        """
+        Stores one session, replacing any earlier session of the same name.
+
+        Args:
+            name (str): Unique session name, e.g. the report file name without extension.
+            session_end (datetime): End of the session; its date is the session date.
+            student_data (dict): Student data keyed by roll number, as passed to `generate_csv_report`.
+            electives (iterable): Electives expected in the session; None derives them from the attendees.
+            room (str): Room the session was held in, if known.
+        """
+        date = session_end.strftime('%Y-%m-%d')
+        rows = [(roll_no, data['metadata']['name'], data['metadata']['elective'], date,
+                 data['entry_time'].isoformat(timespec='seconds'), round(data['time_present'].total_seconds()),
+                 ', '.join(sorted(data['behaviors'])))
+                for roll_no, data in student_data.items()]
+        if not electives:
+            electives = {row[2] for row in rows}
+        with self._connection:
+            self._connection.execute('DELETE FROM sessions WHERE name = ?', (name,))
+            session_id = self._connection.execute(
+                'INSERT INTO sessions (name, date, ended_at, room) VALUES (?, ?, ?, ?)',
+                (name, date, session_end.isoformat(timespec='seconds'), room)).lastrowid
+            self._connection.executemany(
+                'INSERT INTO session_electives (session_id, elective, date) VALUES (?, ?, ?)',
+                [(session_id, elective, date) for elective in sorted(electives)])
+            self._connection.executemany(
+                'INSERT INTO attendance (session_id, roll_no, name, elective, date, entry_time, seconds_present, '
+                'behaviors) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [(session_id,) + row for row in rows])
+        return session_id
+
+    def student_summary(self, since=None, until=None, roll_no=None, elective=None):
+        """
+        Per-student attendance over a date range.
+
+        Returns:
+            list: (roll_no, name, elective, sessions attended, sessions held, percentage, hours present) tuples.
+        """
+        conditions, parameters = self._filters('a', since, until, roll_no=roll_no, elective=elective)
+        held_conditions, held_parameters = self._filters('se', since, until, elective=elective)
+        # Both sides are aggregated before they are joined, so each table is scanned once
+        query = f"""
+            WITH held AS (
+                SELECT elective, COUNT(*) AS sessions FROM session_electives AS se
+                WHERE {held_conditions} GROUP BY elective),
+            attended AS (
+                SELECT a.roll_no, MAX(a.name) AS name, a.elective, COUNT(se.session_id) AS sessions,
+                       SUM(a.seconds_present) AS seconds
+                FROM attendance AS a
+                LEFT JOIN session_electives AS se ON se.session_id = a.session_id AND se.elective = a.elective
+                WHERE {conditions}
+                GROUP BY a.roll_no, a.elective)
+            SELECT attended.roll_no, attended.name, attended.elective, attended.sessions, COALESCE(held.sessions, 0),
+                   ROUND(100.0 * attended.sessions / held.sessions, 1), ROUND(attended.seconds / 3600.0, 2)
+            FROM attended LEFT JOIN held ON held.elective = attended.elective
+            ORDER BY attended.elective, attended.roll_no"""
+        return self._connection.execute(query, held_parameters + parameters).fetchall()
+
+    def elective_summary(self, since=None, until=None, elective=None):
+        """
+        Per-elective attendance over a date range.
+
+        Returns:
+            list: (elective, sessions held, distinct students, mean attendees per session,
+                   mean minutes present per attendance) tuples.
+        """
+        held_conditions, held_parameters = self._filters('se', since, until, elective=elective)
+        conditions, parameters = self._filters('a', since, until, elective=elective)
+        query = f"""
+            WITH held AS (
+                SELECT se.elective, COUNT(*) AS sessions FROM session_electives AS se
+                WHERE {held_conditions} GROUP BY se.elective),
+            attended AS (
+                SELECT a.elective, COUNT(DISTINCT CASE WHEN se.session_id IS NOT NULL THEN a.roll_no END) AS students,
+                       COUNT(se.session_id) AS attendances,
+                       SUM(CASE WHEN se.session_id IS NULL THEN 0 ELSE a.seconds_present END) AS seconds
+                FROM attendance AS a
+                LEFT JOIN session_electives AS se ON se.session_id = a.session_id AND se.elective = a.elective
+                WHERE {conditions}
+                GROUP BY a.elective)
+            SELECT held.elective, held.sessions, COALESCE(attended.students, 0),
+                   ROUND(1.0 * COALESCE(attended.attendances, 0) / held.sessions, 1),
+                   ROUND(attended.seconds / 60.0 / attended.attendances, 1)
+            FROM held LEFT JOIN attended ON attended.elective = held.elective
+            ORDER BY held.elective"""
+        return self._connection.execute(query, held_parameters + parameters).fetchall()
+
+    def date_summary(self, since=None, until=None, roll_no=None, elective=None):
+        """
+        Per-date attendance over a date range.
+
+        Returns:
+            list: (date, sessions, distinct students, attendances, hours present) tuples.
+        """
+        conditions, parameters = self._filters('a', since, until, roll_no=roll_no, elective=elective)
+        query = f"""
+            SELECT a.date, COUNT(DISTINCT a.session_id), COUNT(DISTINCT a.roll_no), COUNT(*),
+                   ROUND(SUM(a.seconds_present) / 3600.0, 2)
+            FROM attendance AS a
+            WHERE {conditions}
+            GROUP BY a.date ORDER BY a.date"""
+        return self._connection.execute(query, parameters).fetchall()
+
+    @staticmethod
+    def _filters(alias, since, until, roll_no=None, elective=None):
+        """Builds a WHERE clause over a table with `date` (and `roll_no`/`elective`) columns."""
+        conditions, parameters = [], []
+        for column, operator, value in (('date', '>=', since), ('date', '<=', until),
+                                        ('roll_no', '=', roll_no), ('elective', '=', elective)):
+            if value is not None:
+                conditions.append(f"{alias}.{column} {operator} ?")
+                parameters.append(value)
+        return ' AND '.join(conditions) or '1', parameters
+
+
+def record_session(path, name, session_end, student_data, electives=None, room=None):
+    """Stores one session in the attendance store at `path`; see `AttendanceStore.record_session`."""
+    try:
+        with AttendanceStore(path) as store:
+            store.record_session(name, session_end, student_data, electives=electives, room=room)
+        print(f"SUCCESS: Session '{name}' added to the attendance store {path}")
+    except sqlite3.Error as e:
+        print(f"ERROR: Could not add the session to the attendance store {path}: {e}")
+
+
+def _print_table(headers, rows):
+    cells = [[str(value) if value is not None else '-' for value in row] for row in rows]
+    widths = [max([len(header)] + [len(row[column]) for row in cells]) for column, header in enumerate(headers)]
+    print('  '.join(header.ljust(width) for header, width in zip(headers, widths)))
+    for row in cells:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    """Prints attendance aggregates from the store."""
+    parser = argparse.ArgumentParser(description="Query the StudyGuard attendance store")
+    parser.add_argument("view", choices=('students', 'electives', 'dates'),
+                        help="Aggregate per student, per elective or per date.")
+    parser.add_argument("--db", default=ATTENDANCE_DB, help="Path of the attendance store.")
+    parser.add_argument("--since", help="First date to include, as YYYY-MM-DD.")
+    parser.add_argument("--until", help="Last date to include, as YYYY-MM-DD.")
+    parser.add_argument("--roll_no", help="Only this student (students and dates views).")
+    parser.add_argument("--elective", help="Only this elective.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"No attendance store at {args.db}; it is created when the first session ends.")
+    started_at = time.perf_counter()
+    with AttendanceStore(args.db) as store:
+        if args.view == 'students':
+            headers = ('roll_no', 'name', 'elective', 'attended', 'held', 'percent', 'hours')
+            rows = store.student_summary(args.since, args.until, roll_no=args.roll_no, elective=args.elective)
+        elif args.view == 'electives':
+            headers = ('elective', 'sessions', 'students', 'per_session', 'avg_minutes')
+            rows = store.elective_summary(args.since, args.until, elective=args.elective)
+        else:
+            headers = ('date', 'sessions', 'students', 'attendances', 'hours')
+            rows = store.date_summary(args.since, args.until, roll_no=args.roll_no, elective=args.elective)
+    _print_table(headers, rows)
+    print(f"INFO: {len(rows)} rows in {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
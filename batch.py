@@ -0,0 +1,103 @@
+import copy
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from controller import StudyGuardController
+from face_manager import FaceManager
+
+# --- Constants ---
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.webm')
+
+
+def collect_videos(paths):
+    """
+    Expands a list of video files and directories into a sorted list of video files.
+
+    Args:
+        paths (list): Video files and/or directories containing recorded lectures.
+
+    Returns:
+        list: Paths of the videos to process.
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            videos.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                          if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"WARNING: Skipping '{path}': not a file or directory.")
+    return videos
+
+
+def report_names(videos):
+    """
+    Names each video's report after its file name, prefixed with its directory when
+    several videos share a file name, and numbered if that is still ambiguous.
+
+    Returns:
+        dict: Report names keyed by video path.
+    """
+    stems = [os.path.splitext(os.path.basename(video_path))[0] for video_path in videos]
+    names = [stem if stems.count(stem) == 1
+             else f"{os.path.basename(os.path.dirname(os.path.abspath(video_path)))}_{stem}"
+             for video_path, stem in zip(videos, stems)]
+    names = [name if names.count(name) == 1 else f"{name}_{index}" for index, name in enumerate(names, start=1)]
+    return {video_path: f"attendance_report_{name}" for video_path, name in zip(videos, names)}
+
+
+# Roster shared by the videos a worker process handles, set by _init_worker
+_worker_face_manager = None
+
+
+def _init_worker(encodings, metadata):
+    """Rebuilds the parent's roster in a worker process, so workers never enroll or write the encoding cache."""
+    global _worker_face_manager
+    _worker_face_manager = FaceManager.from_encodings(encodings, metadata)
+
+
+def _process_video(video_path, report_name, controller_options, face_manager=None):
+    """Runs a headless controller over one recording and writes its report."""
+    # Each video gets its own copy of stateful options such as the scheduler.
+    controller_options = copy.deepcopy(controller_options)
+    controller = StudyGuardController(video_path, headless=True, report_name=report_name,
+                                      face_manager=face_manager or _worker_face_manager, **controller_options)
+    controller.run_monitoring()
+    return video_path
+
+
+def process_videos(paths, jobs=None, **controller_options):
+    """
+    Audits recorded lectures headlessly, several at a time, with one report per video.
+
+    Args:
+        paths (list): Video files and/or directories of videos.
+        jobs (int): Number of videos processed concurrently; defaults to one per CPU core.
+        **controller_options: Extra keyword arguments for each `StudyGuardController`.
+    """
+    videos = collect_videos(paths)
+    if not videos:
+        print("ERROR: No videos found to process.")
+        return
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(videos)))
+    names = report_names(videos)
+    # The roster is enrolled once, here; parallel jobs enrolling on their own would race on the encoding cache.
+    face_manager = FaceManager()
+    print(f"INFO: Processing {len(videos)} videos with {jobs} parallel jobs...")
+    if jobs == 1:
+        for video_path in videos:
+            _process_video(video_path, names[video_path], controller_options, face_manager)
+        return
+
+    roster = (face_manager.known_face_encodings, face_manager.known_face_metadata)
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context('spawn'), initializer=_init_worker,
+                             initargs=roster) as executor:
+        futures = {executor.submit(_process_video, video_path, names[video_path], controller_options): video_path
+                   for video_path in videos}
+        for future in as_completed(futures):
+            try:
+                print(f"SUCCESS: Finished processing {future.result()}.")
+            except Exception as e:
+                print(f"ERROR: Could not process {futures[future]}: {e}")
@@ -1,13 +1,16 @@
 
 import random
 
+# --- Constants ---
+POSSIBLE_ACTIONS = ('sitting', 'standing', 'raising_hand', 'engaged', 'distracted')
+
 class BehaviorAnalyzer:
     """
     Analyzes sequences of video frames to determine student actions.
     This is currently a simulation.
     """
     def __init__(self):
-        self.possible_actions = ['sitting', 'standing', 'raising_hand', 'engaged', 'distracted']
+        self.possible_actions = list(POSSIBLE_ACTIONS)
         # In a real scenario, you would load your trained model here:
         # self.model = tf.keras.models.load_model('path/to/your/3d_cnn_model.h5')
         print("INFO: Behavior Analyzer (Simulated) initialized.")
@@ -17,7 +20,7 @@ class BehaviorAnalyzer:
         Takes a sequence of frames and returns a simulated action.
         
         Args:
-            frame_sequence (list): A list of video frames (e.g., from a frame buffer).
+            frame_sequence (ndarray): A (frames, height, width, 3) clip, e.g. a view from the frame ring buffer.
         
         Returns:
             str: A randomly chosen action from `self.possible_actions` to simulate model output.
@@ -28,6 +31,6 @@ class BehaviorAnalyzer:
         # 3. Predict with the model: prediction = self.model.predict(processed_sequence)
         # 4. Decode the prediction: return self.possible_actions[np.argmax(prediction)]
         # --- SIMULATION ---
-        if frame_sequence:
+        if len(frame_sequence):
             return random.choice(self.possible_actions)
         return 'unknown'
@@ -0,0 +1,217 @@
+import os
+import queue
+import threading
+from startup import lazy_import
+from behavior_analyzer import BehaviorAnalyzer, POSSIBLE_ACTIONS
+from metrics import NULL_METRICS
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# --- Constants ---
+CLIP_FRAMES = 16  # Frames sampled from the buffered window for each student clip
+CROP_SIZE = (112, 112)  # (width, height) of a student crop, the usual input size of 3D-CNN action models
+BODY_WIDTH_RATIO = 3.0  # A body crop is this many face widths wide...
+BODY_HEIGHT_RATIO = 4.0  # ...and this many face heights tall, starting half a face above the face
+
+_STOP = object()
+
+
+class SimulatedBackend:
+    """Fallback backend: the `BehaviorAnalyzer` simulation, applied to each clip."""
+    name = 'simulated'
+
+    def __init__(self):
+        self.analyzer = BehaviorAnalyzer()
+
+    def predict(self, clips):
+        return [self.analyzer.analyze_actions(clip) for clip in clips]
+
+
+class NumpyBackend:
+    """
+    A linear softmax classifier in pure NumPy, loaded from an `.npz` file with
+    `weights` (features x actions), `bias` (actions) and `actions` (names) arrays.
+
+    Each clip is described by its mean frame and its mean absolute frame-to-frame
+    difference, both scaled to [0, 1] and flattened, so `weights` has 2 * 112 * 112 * 3
+    rows for the default crop size.
+    """
+    name = 'numpy'
+
+    def __init__(self, model_path):
+        model = np.load(model_path, allow_pickle=False)
+        self.weights = model['weights'].astype(np.float32)
+        self.bias = model['bias'].astype(np.float32)
+        self.actions = [str(action) for action in model['actions']]
+
+    def predict(self, clips):
+        clips = clips.astype(np.float32) / 255.0
+        appearance = clips.mean(axis=1).reshape(len(clips), -1)
+        motion = np.abs(np.diff(clips, axis=1)).mean(axis=1).reshape(len(clips), -1)
+        logits = np.concatenate([appearance, motion], axis=1) @ self.weights + self.bias
+        return [self.actions[index] for index in logits.argmax(axis=1)]
+
+
+class OnnxBackend:
+    """
+    Runs an ONNX action-recognition model on the CPU with ONNX Runtime.
+
+    The model takes a float32 batch of clips laid out as (students, 3, frames, height, width)
+    with values in [0, 1] and returns one score per action. Action names are read from a
+    `<model>.actions.txt` file next to the model, one per line, if it exists.
+    """
+    name = 'onnx'
+
+    def __init__(self, model_path):
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.actions = list(POSSIBLE_ACTIONS)
+        actions_path = os.path.splitext(model_path)[0] + '.actions.txt'
+        if os.path.exists(actions_path):
+            with open(actions_path, 'r', encoding='utf-8') as f:
+                self.actions = [line.strip() for line in f if line.strip()]
+
+    def predict(self, clips):
+        batch = np.ascontiguousarray(clips.transpose(0, 4, 1, 2, 3), dtype=np.float32) / 255.0
+        scores = self.session.run(None, {self.input_name: batch})[0]
+        return [self.actions[index] for index in np.asarray(scores).argmax(axis=1)]
+
+
+def create_backend(model_path=None):
+    """
+    Picks the inference backend for a model file: `.onnx` runs on ONNX Runtime, `.npz` on
+    NumPy. Without a model, or if it cannot be loaded, the simulator is used.
+    """
+    if model_path:
+        backends = {'.onnx': OnnxBackend, '.npz': NumpyBackend}
+        backend_class = backends.get(os.path.splitext(model_path)[1].lower())
+        if backend_class is None:
+            print(f"WARNING: Unsupported behavior model '{model_path}' (expected .onnx or .npz). Using the simulator.")
+        else:
+            try:
+                backend = backend_class(model_path)
+                print(f"INFO: Loaded behavior model {model_path} ({backend.name} backend).")
+                return backend
+            except ImportError:
+                print("WARNING: onnxruntime is not installed (pip install onnxruntime). Using the simulator.")
+            except Exception as e:
+                print(f"WARNING: Could not load behavior model '{model_path}': {e}. Using the simulator.")
+    return SimulatedBackend()
+
+
+class BehaviorInferenceEngine:
+    """
+    Classifies student behavior on a background thread, one batched model call per window.
+
+    `submit` samples a short clip from the buffered frames and returns at once. The
+    inference thread crops a body region around every tracked student's face, stacks
+    all crops into one batch for the backend and publishes one action per student,
+    which the video loop picks up with `collect`. If a window is submitted while the
+    previous one is still waiting, the older window is dropped, so the video loop never
+    waits on inference.
+    """
+    def __init__(self, backend=None, clip_frames=CLIP_FRAMES, crop_size=CROP_SIZE, metrics=NULL_METRICS):
+        self.backend = backend or SimulatedBackend()
+        self.clip_frames = clip_frames
+        self.crop_size = crop_size
+        self.metrics = metrics
+        self.dropped_windows = 0
+        self._requests = queue.Queue(maxsize=1)
+        self._results = queue.Queue()
+        self._thread = None
+
+    def submit(self, clip, regions=None):
+        """
+        Queues a behavior window for inference.
+
+        Args:
+            clip (ndarray): (frames, height, width, 3) buffered frames; may be a view that is reused later.
+            regions (dict): Face boxes keyed by roll number, as (top, right, bottom, left) fractions of the
+                            frame size. None (or empty) classifies the whole frame for all present students.
+        """
+        if not len(clip):
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='behavior-inference', daemon=True)
+            self._thread.start()
+        # Fancy indexing copies the sampled frames out of the ring buffer.
+        frames = clip[np.linspace(0, len(clip) - 1, min(self.clip_frames, len(clip))).round().astype(int)]
+        request = (frames, dict(regions) if regions else None)
+        while True:
+            try:
+                self._requests.put_nowait(request)
+                return
+            except queue.Full:
+                try:
+                    self._requests.get_nowait()
+                    self.dropped_windows += 1
+                except queue.Empty:
+                    pass
+
+    def collect(self):
+        """
+        Returns the results finished since the last call, without waiting.
+
+        Returns:
+            list: (roll_no, action) pairs; roll_no is None for a whole-frame result that
+                  applies to every present student.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """Finishes the pending window and stops the inference thread."""
+        if self._thread is None:
+            return
+        self._requests.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is _STOP:
+                return
+            frames, regions = request
+            try:
+                with self.metrics.stage('behavior_inference'):
+                    roll_nos, clips = self._crop_clips(frames, regions)
+                    actions = self.backend.predict(clips)
+            except Exception as e:
+                print(f"ERROR: Behavior inference failed: {e}")
+                continue
+            for roll_no, action in zip(roll_nos, actions):
+                self._results.put((roll_no, action))
+
+    def _crop_clips(self, frames, regions):
+        """Crops and resizes one clip per student into a (students, frames, height, width, 3) batch."""
+        height, width = frames.shape[1:3]
+        if not regions:
+            regions = {None: (0.0, 1.0, 1.0, 0.0)}
+        crop_width, crop_height = self.crop_size
+        clips = np.empty((len(regions), len(frames), crop_height, crop_width, 3), dtype=np.uint8)
+        for clip, (roll_no, box) in zip(clips, regions.items()):
+            top, right, bottom, left = self._body_region(box, roll_no is None)
+            y0, x0 = min(int(top * height), height - 1), min(int(left * width), width - 1)
+            y1, x1 = max(y0 + 1, round(bottom * height)), max(x0 + 1, round(right * width))
+            for frame, crop in zip(frames, clip):
+                cv2.resize(frame[y0:y1, x0:x1], self.crop_size, dst=crop, interpolation=cv2.INTER_AREA)
+        return list(regions), clips
+
+    @staticmethod
+    def _body_region(box, whole_frame):
+        """Widens a face box to the upper body below it, clipped to the frame (all as fractions)."""
+        if whole_frame:
+            return box
+        top, right, bottom, left = box
+        face_width, face_height = right - left, bottom - top
+        centre = (left + right) / 2.0
+        return (max(0.0, top - 0.5 * face_height),
+                min(1.0, centre + BODY_WIDTH_RATIO * face_width / 2.0),
+                min(1.0, top + (BODY_HEIGHT_RATIO - 0.5) * face_height),
+                max(0.0, centre - BODY_WIDTH_RATIO * face_width / 2.0))
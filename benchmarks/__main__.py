@@ -0,0 +1,62 @@
+import argparse
+import sys
+from benchmarks.suite import run_suite, compare_with_baseline, DEFAULT_THRESHOLD, ROSTER_SIZES
+
+
+def main():
+    """
+    Runs the benchmark suite, saves the results and optionally checks them against a baseline.
+    """
+    parser = argparse.ArgumentParser(description="StudyGuard performance benchmarks (offline, CPU only)")
+    parser.add_argument(
+        "--video",
+        type=str,
+        default=None,
+        help="Recorded lecture to benchmark recognition and end-to-end FPS on (default: a generated synthetic video)."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(ROSTER_SIZES),
+        help="Roster sizes for the matching benchmarks."
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=300,
+        help="Number of frames in the generated synthetic video."
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="benchmark_results.json",
+        help="Where to save the results; copy this file to use it as a baseline."
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="Compare against a saved results file and exit with status 1 if any metric regressed."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative change recorded as each metric's regression threshold, e.g. 0.2 for 20%%."
+    )
+    args = parser.parse_args()
+
+    results = run_suite(video_path=args.video, sizes=tuple(args.sizes), frames=args.frames,
+                        threshold=args.threshold)
+    results.save(args.output)
+
+    if args.compare:
+        print(f"INFO: Comparing with baseline {args.compare}:")
+        regressions = compare_with_baseline(results.metrics, args.compare)
+        if regressions:
+            print(f"ERROR: {len(regressions)} metrics regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("SUCCESS: No regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from startup import lazy_import
+from face_manager import FaceManager
+from controller import StudyGuardController
+from student_tracker import StudentTracker
+from utils import generate_csv_report
+from attendance_store import AttendanceStore
+from benchmarks.synthetic import (synthetic_roster, synthetic_sightings, write_synthetic_enrollment,
+                                  write_synthetic_video)
+cv2 = lazy_import('cv2')
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Constants ---
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.2  # Relative change against the baseline that counts as a regression
+ROSTER_SIZES = (100, 1000, 10000)
+FACES_PER_FRAME = 40
+ENROLLMENT_SIZE = 50
+TRACKER_PASSES = 500
+STORE_STUDENTS = 300
+STORE_DAYS = 250  # About one academic year of teaching days, one session per elective a day
+REPEATS = 5
+
+
+class BenchmarkResults:
+    """
+    Collects benchmark metrics and saves them as a machine-readable baseline.
+
+    Every metric records whether higher values are better and the relative change
+    that counts as a regression when a later run is compared with it.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.metrics = {}
+
+    def add(self, name, value, unit, higher_is_better=False):
+        self.metrics[name] = {'value': round(value, 4), 'unit': unit, 'higher_is_better': higher_is_better,
+                              'threshold': self.threshold}
+        direction = 'higher is better' if higher_is_better else 'lower is better'
+        print(f"INFO:   {name:<40} {value:12.3f} {unit:<8} ({direction})")
+
+    def save(self, path):
+        results = {
+            'version': RESULTS_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                        'cpus': os.cpu_count()},
+            'metrics': self.metrics,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"SUCCESS: Benchmark results saved to {path}")
+
+
+def compare_with_baseline(metrics, baseline_path):
+    """
+    Compares metrics with a saved baseline and prints every regression.
+
+    A metric regresses when it is worse than the baseline by more than the baseline's
+    threshold for it. Metrics missing from either side are ignored.
+
+    Returns:
+        list: Names of the regressed metrics.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['metrics']
+
+    regressions = []
+    for name, reference in baseline.items():
+        if name not in metrics or not reference['value']:
+            continue
+        change = metrics[name]['value'] / reference['value'] - 1.0
+        worse = -change if reference['higher_is_better'] else change
+        status = 'REGRESSION' if worse > reference['threshold'] else 'ok'
+        print(f"INFO:   {name:<40} {reference['value']:12.3f} -> {metrics[name]['value']:12.3f} "
+              f"({change:+.1%}) {status}")
+        if status == 'REGRESSION':
+            regressions.append(name)
+    return regressions
+
+
+def median_time(function, repeats=REPEATS):
+    """Calls `function` `repeats` times and returns the median wall time in seconds."""
+    timings = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    return statistics.median(timings)
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB, or None where it is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hides the INFO output of the components being timed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_enrollment(results, workdir, size=ENROLLMENT_SIZE):
+    """Times `FaceManager` enrollment with an empty and with a warm encoding cache."""
+    student_db_csv, images_dir = write_synthetic_enrollment(os.path.join(workdir, 'enrollment'), size)
+    cache_dir = os.path.join(workdir, 'enrollment', 'encoding_cache')
+    with quiet():
+        started_at = time.perf_counter()
+        FaceManager(student_db_csv, images_dir, cache_dir)
+        cold = time.perf_counter() - started_at
+        warm = median_time(lambda: FaceManager(student_db_csv, images_dir, cache_dir))
+    results.add(f"enrollment_cold_{size}_ms", cold * 1000, 'ms')
+    results.add(f"enrollment_warm_{size}_ms", warm * 1000, 'ms')
+
+
+def bench_matching(results, sizes=ROSTER_SIZES, faces=FACES_PER_FRAME):
+    """Times matching one frame's faces against rosters of several sizes, face by face and batched."""
+    for size in sizes:
+        encodings, metadata = synthetic_roster(size)
+        face_manager = FaceManager.from_encodings(encodings, metadata)
+        sightings = synthetic_sightings(encodings, faces)
+        per_face = median_time(lambda: [face_manager.find_match(face) for face in sightings])
+        batched = median_time(lambda: face_manager.find_matches(sightings))
+        results.add(f"find_match_{size}_ms", per_face * 1000, 'ms')
+        results.add(f"find_matches_{size}_ms", batched * 1000, 'ms')
+
+        # A timetabled session: one elective's students first, the rest only for visitors
+        elective = metadata[0]['elective']
+        session_roster = face_manager.session_roster([elective])
+        expected_rows = [row for row, student in enumerate(metadata) if student['elective'] == elective]
+        session_sightings = synthetic_sightings(encodings[expected_rows], faces)
+        session = median_time(lambda: session_roster.find_matches(session_sightings))
+        results.add(f"find_matches_session_{size}_ms", session * 1000, 'ms')
+
+
+def bench_process_frame(results, video_path, face_manager, frames=10):
+    """Times a recognition pass (`_process_frame`) on frames of the test video."""
+    video_capture = cv2.VideoCapture(video_path)
+    with quiet():
+        controller = StudyGuardController(video_path, headless=True, face_manager=face_manager, event_log=False)
+    prepared = []
+    while len(prepared) < frames:
+        ret, frame = video_capture.read()
+        if not ret:
+            break
+        prepared.append(controller._prepare_frame(frame))
+    video_capture.release()
+    if not prepared:
+        print(f"WARNING: No frames could be read from {video_path}; skipping the recognition benchmark.")
+        return
+    timings = []
+    for frame in prepared:
+        started_at = time.perf_counter()
+        controller._process_frame(frame)
+        timings.append(time.perf_counter() - started_at)
+    results.add('process_frame_ms', statistics.median(timings) * 1000, 'ms')
+
+
+def bench_tracker(results, size=max(ROSTER_SIZES), present=FACES_PER_FRAME, passes=TRACKER_PASSES):
+    """
+    Times `StudentTracker` recognition passes over a simulated session in which students
+    keep coming and going. Returns the tracker for the report benchmark.
+    """
+    _, metadata = synthetic_roster(size)
+    session_time = [0.0]
+    tracker = StudentTracker(clock=lambda: session_time[0])
+
+    def run_session():
+        for index in range(passes):
+            session_time[0] += 1.0
+            start = (index // 20) * present % size
+            seen = metadata[start:start + present]
+            for student in seen:
+                tracker.update_student(student['roll_no'], student)
+            tracker.mark_absent({student['roll_no'] for student in seen})
+
+    results.add('tracker_pass_us', median_time(run_session) / passes * 1e6, 'us')
+    return tracker
+
+
+def bench_report(results, tracker, workdir):
+    """Times writing the final CSV report."""
+    student_data = tracker.get_all_students_data()
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with quiet():
+            elapsed = median_time(lambda: generate_csv_report(student_data, report_name='benchmark_report'))
+    finally:
+        os.chdir(previous_dir)
+    results.add(f"csv_report_{len(student_data)}_ms", elapsed * 1000, 'ms')
+
+
+def bench_attendance_store(results, workdir, students=STORE_STUDENTS, days=STORE_DAYS):
+    """Fills an attendance store with a year of sessions and times its aggregate queries."""
+    _, metadata = synthetic_roster(students)
+    electives = sorted({student['elective'] for student in metadata})
+    started = datetime(2024, 1, 1, 9)
+    with AttendanceStore(os.path.join(workdir, 'attendance.db')) as store:
+        for day in range(days):
+            session_end = started + timedelta(days=day, hours=1)
+            for elective in electives:
+                # Every student of the elective attends, except a rotating tenth of them
+                student_data = {student['roll_no']: {'metadata': student, 'entry_time': started + timedelta(days=day),
+                                                     'time_present': timedelta(minutes=50), 'behaviors': set()}
+                                for index, student in enumerate(metadata)
+                                if student['elective'] == elective and (index + day) % 10}
+                store.record_session(f"{elective}_{day}", session_end, student_data, electives=[elective])
+
+        results.add(f"store_students_{days}d_ms", median_time(store.student_summary) * 1000, 'ms')
+        results.add(f"store_electives_{days}d_ms", median_time(store.elective_summary) * 1000, 'ms')
+        results.add(f"store_dates_{days}d_ms", median_time(store.date_summary) * 1000, 'ms')
+        results.add('store_student_ms', median_time(lambda: store.student_summary(roll_no=metadata[0]['roll_no']))
+                    * 1000, 'ms')
+
+
+def bench_end_to_end(results, video_path, face_manager, workdir):
+    """Measures frames per second of a headless run over the whole test video."""
+    video_capture = cv2.VideoCapture(video_path)
+    total_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_capture.release()
+
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with quiet():
+            controller = StudyGuardController(video_path, headless=True, face_manager=face_manager,
+                                              event_log=False, report_name='benchmark_session')
+            started_at = time.perf_counter()
+            controller.run_monitoring()
+            elapsed = time.perf_counter() - started_at
+    finally:
+        os.chdir(previous_dir)
+    if total_frames > 0:
+        results.add('end_to_end_fps', total_frames / elapsed, 'fps', higher_is_better=True)
+
+
+def run_suite(video_path=None, sizes=ROSTER_SIZES, frames=300, threshold=DEFAULT_THRESHOLD):
+    """
+    Runs every benchmark on synthetic data, offline and on the CPU only.
+
+    Args:
+        video_path (str): A recorded lecture to benchmark recognition on; a synthetic video is generated if None.
+        sizes (tuple): Roster sizes for the matching benchmarks.
+        frames (int): Length of the generated synthetic video.
+        threshold (float): Relative change that counts as a regression for the saved metrics.
+
+    Returns:
+        BenchmarkResults: The collected metrics.
+    """
+    results = BenchmarkResults(threshold)
+    with tempfile.TemporaryDirectory(prefix='studyguard_bench_') as workdir:
+        if video_path is None:
+            video_path = write_synthetic_video(os.path.join(workdir, 'classroom.avi'), frames=frames)
+        print("INFO: Running StudyGuard benchmarks...")
+        bench_enrollment(results, workdir)
+        bench_matching(results, sizes)
+        tracker = bench_tracker(results)
+        bench_report(results, tracker, workdir)
+        bench_attendance_store(results, workdir)
+        if video_path is not None:
+            encodings, metadata = synthetic_roster(max(sizes))
+            face_manager = FaceManager.from_encodings(encodings, metadata)
+            bench_process_frame(results, video_path, face_manager)
+            bench_end_to_end(results, video_path, face_manager, workdir)
+        rss = peak_rss_mb()
+        if rss is not None:
+            results.add('peak_rss_mb', rss, 'MB')
+    return results
@@ -0,0 +1,112 @@
+import csv
+import os
+from startup import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# --- Constants ---
+# Scale of a synthetic encoding: two different students end up about 0.85 apart, above the
+# 0.6 match tolerance, much like real dlib encodings of different people.
+ENCODING_SCALE = 0.053
+QUERY_NOISE = 0.02  # Per-dimension noise of a synthetic sighting; about 0.23 from the enrolled encoding
+ELECTIVES = ['Physics', 'Chemistry', 'Biology', 'Computer Science']
+
+
+def synthetic_roster(size, seed=0):
+    """
+    Generates a roster of random face encodings and matching student metadata.
+
+    Args:
+        size (int): Number of students.
+        seed (int): Random seed, so every run benchmarks the same roster.
+
+    Returns:
+        tuple: (encodings, metadata) as accepted by `FaceManager.from_encodings`.
+    """
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(scale=ENCODING_SCALE, size=(size, 128))
+    metadata = [{'roll_no': f"S{index:05d}", 'name': f"Student {index}", 'elective': ELECTIVES[index % len(ELECTIVES)]}
+                for index in range(size)]
+    return encodings, metadata
+
+
+def synthetic_sightings(encodings, count, strangers=0.25, seed=1):
+    """
+    Generates the encodings of the faces seen in one frame.
+
+    Args:
+        encodings (ndarray): The roster encodings.
+        count (int): Number of faces in the frame.
+        strangers (float): Fraction of faces that belong to nobody on the roster.
+        seed (int): Random seed.
+
+    Returns:
+        list: `count` encodings, most of them noisy copies of distinct roster entries.
+    """
+    rng = np.random.default_rng(seed)
+    known = min(len(encodings), int(round(count * (1.0 - strangers))))
+    rows = rng.choice(len(encodings), size=known, replace=False)
+    faces = [encodings[row] + rng.normal(scale=QUERY_NOISE, size=128) for row in rows]
+    faces += [rng.normal(scale=ENCODING_SCALE, size=128) for _ in range(count - known)]
+    return faces
+
+
+def write_synthetic_video(path, frames=300, size=(1280, 720), fps=30.0, people=12, seed=0):
+    """
+    Writes a classroom-like test video: a static background with slowly moving figures.
+
+    The figures are not real faces, so face detection finds little in it; it measures the
+    cost of decoding, detection and the monitoring loop. Use a recorded lecture for
+    realistic recognition load.
+
+    Returns:
+        str: `path`, or None if OpenCV could not write the video.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+    cv2.GaussianBlur(background, (0, 0), 8, dst=background)
+    positions = rng.uniform((0, height * 0.3), (width, height * 0.9), size=(people, 2))
+    velocities = rng.normal(scale=2.0, size=(people, 2))
+    colors = rng.integers(80, 255, size=(people, 3)).tolist()
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    if not writer.isOpened():
+        print(f"ERROR: OpenCV cannot write the synthetic video '{path}'.")
+        return None
+    try:
+        for _ in range(frames):
+            frame = background.copy()
+            positions = np.clip(positions + velocities, (0, 0), (width - 1, height - 1))
+            for (x, y), color in zip(positions.astype(int).tolist(), colors):
+                cv2.rectangle(frame, (x - 30, y), (x + 30, y + 120), color, -1)
+                cv2.ellipse(frame, (x, y - 35), (24, 32), 0, 0, 360, (150, 180, 220), -1)
+                cv2.circle(frame, (x - 9, y - 42), 3, (30, 30, 30), -1)
+                cv2.circle(frame, (x + 9, y - 42), 3, (30, 30, 30), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def write_synthetic_enrollment(directory, size, seed=0):
+    """
+    Writes a student database CSV and one photo per student for enrollment benchmarks.
+
+    Returns:
+        tuple: (path of the database CSV, path of the images directory).
+    """
+    rng = np.random.default_rng(seed)
+    images_dir = os.path.join(directory, 'student_images')
+    os.makedirs(images_dir, exist_ok=True)
+    student_db_csv = os.path.join(directory, 'students_db.csv')
+    _, metadata = synthetic_roster(size, seed)
+    with open(student_db_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['roll_no', 'name', 'elective'])
+        writer.writeheader()
+        writer.writerows(metadata)
+    for student in metadata:
+        photo = rng.integers(0, 255, size=(240, 200, 3), dtype=np.uint8)
+        cv2.ellipse(photo, (100, 110), (60, 80), 0, 0, 360, (150, 180, 220), -1)
+        cv2.imwrite(os.path.join(images_dir, f"{student['roll_no']}.jpg"), photo)
+    return student_db_csv, images_dir
@@ -1,96 +1,566 @@
 
-import cv2
-from datetime import datetime
-import face_recognition
-import numpy as np
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from startup import lazy_import, preload_in_background, print_startup_report, timed_phase
 from face_manager import FaceManager
-from behavior_analyzer import BehaviorAnalyzer
+from timetable import expected_electives
+from recognition_cache import CachedRoster, RecognitionCache
+from behavior_engine import BehaviorInferenceEngine, CLIP_FRAMES, create_backend
 from student_tracker import StudentTracker
 from utils import generate_csv_report
+from pipeline import FramePipeline, WINDOW_NAME
+from recognition_workers import RecognitionWorkerPool
+from face_tracks import FaceTrackManager
+from scheduler import RecognitionScheduler
+from frame_ring import FrameRingBuffer
+from overlay import PresenceOverlay
+from report_sink import ReportSink, load_event_log
+from detection_log import DetectionLog, DetectionLogWriter
+from metrics import NULL_METRICS, log_metrics, register_session
+cv2 = lazy_import('cv2')
+face_recognition = lazy_import('face_recognition')
+np = lazy_import('numpy')
 
 # --- Constants ---
-FRAME_PROCESS_INTERVAL = 10  # Process every 10th frame for performance
+FRAME_PROCESS_INTERVAL = 10  # Process every 10th frame for performance (unless an adaptive scheduler is used)
 BEHAVIOR_ANALYSIS_INTERVAL = 90  # Analyze behavior every 90 frames (approx 3 seconds)
 FACE_MATCH_TOLERANCE = 0.6  # Lower is stricter
+BEHAVIOR_CLIP_LENGTH = BEHAVIOR_ANALYSIS_INTERVAL  # Frames kept for one behavior analysis window
+BEHAVIOR_CLIP_STRIDE = 1  # Keep every Nth frame in the behavior window (headless runs default to the sampler's stride)
+BEHAVIOR_FRAME_SIZE = None  # (width, height) of buffered frames; None keeps the half-resolution frame size
+MAX_IN_FLIGHT_FRAMES = 4  # Frames queued between pipeline stages before stale ones are dropped
+TIMETABLE_CHECK_INTERVAL = 60.0  # Seconds of session time between checks for a new timetable slot
 
 class StudyGuardController:
     """
     Orchestrates the entire monitoring process.
     """
-    def __init__(self, video_source):
+    def __init__(self, video_source, pipelined=False, max_in_flight=MAX_IN_FLIGHT_FRAMES, num_workers=0,
+                 track_faces=True, scheduler=None, clip_length=BEHAVIOR_CLIP_LENGTH,
+                 clip_stride=None, clip_size=BEHAVIOR_FRAME_SIZE, headless=False,
+                 report_name='attendance_report', face_manager=None, event_log=True, startup_report=False,
+                 instrument=True, behavior_model=None, face_detector=None, room=None, timetable=None,
+                 electives=None, recognition_cache=True, display_size=None, display_fps=None,
+                 match_tolerance=FACE_MATCH_TOLERANCE, detection_log=False, attendance_db=None):
         print("INFO: Initializing StudyGuard Controller...")
         self.video_source = video_source
-        self.face_manager = FaceManager()
-        self.behavior_analyzer = BehaviorAnalyzer()
+        self.headless = headless
+        self.report_name = report_name
+        self.pipelined = pipelined
+        self.max_in_flight = max_in_flight
+        self.num_workers = num_workers
+        self.startup_report = startup_report
+        self._worker_pool = None
+        # Several controllers may share one FaceManager, whose roster is read-only once loaded.
+        # Otherwise the roster is loaded by run_monitoring, in parallel with opening the video.
+        self.face_manager = face_manager
+        # Students expected in this session are matched first: given `electives`, or those the
+        # `timetable` schedules in `room` now. `roster` is what faces are matched against.
+        self.room = room
+        self.timetable = timetable
+        self.electives = electives
+        self.roster = None
+        self.session_electives = None
+        self._roster_electives = None  # Electives the current roster was selected for
+        self._event_sink = None  # Set once the session's event log is open; roster changes are logged to it
+        self._next_timetable_check = None
+        self.match_tolerance = match_tolerance
+        # Sessions are also added to this multi-session attendance store (see attendance_store.py), if set
+        self.attendance_db = attendance_db
+        # Recently seen encodings reuse their decision, "unknown" included, instead of a roster scan
+        self.recognition_cache = RecognitionCache(clock=lambda: self._clock()) if recognition_cache else None
+        # Per-stage timers and frame counters; NULL_METRICS makes every call a no-op
+        self.metrics = register_session(report_name) if instrument else NULL_METRICS
+        if face_manager is not None:
+            self._select_roster()
+        # Presence and behavior events are streamed to disk as they happen so a crash loses almost nothing.
+        # Every pass's face boxes and encodings can be recorded, so matching can be replayed without the video.
+        # Both logs are opened by _open_session_logs once the session's source is available.
+        self.event_log = event_log
+        self.event_log_path = None
+        # Name of the session in the attendance store: the event log's name, so --summarize replaces it
+        self.session_name = None
+        self.record_detections = detection_log
+        self.detection_log = None
         self.student_tracker = StudentTracker()
-        self.frame_buffer = []
+        # Follows faces between recognition passes so only new or doubtful ones are re-identified
+        self.face_tracks = FaceTrackManager() if track_faces else None
+        self.scheduler = scheduler or RecognitionScheduler(FRAME_PROCESS_INTERVAL)
+        # Optional detector that searches only likely regions (see roi_detection.py); None scans every full frame
+        self.face_detector = face_detector
+        if clip_stride is None:
+            # Behavior analysis samples CLIP_FRAMES frames per window, so headless runs need not decode the rest
+            clip_stride = max(1, clip_length // CLIP_FRAMES) if headless else BEHAVIOR_CLIP_STRIDE
+        self.frame_buffer = FrameRingBuffer(clip_length, stride=clip_stride, frame_size=clip_size)
+        # Guards the student tracker, which the pipelined stages share across threads
+        self._state_lock = threading.Lock()
+        # Session clock in seconds; headless runs on recordings switch it to the position in the video
+        self._clock = time.monotonic
+        # Per-student behavior inference runs on its own thread; results are applied as they arrive
+        self.behavior_engine = BehaviorInferenceEngine(create_backend(behavior_model), metrics=self.metrics)
+        # (height, width) of the frames recognition runs on, to express face boxes as fractions
+        self._recognition_frame_size = None
+        # The display may run at its own (width, height) and frame rate; the text overlay is only
+        # re-rendered when the set of present students changes
+        self.display_size = display_size
+        self.display_fps = display_fps
+        self.overlay = PresenceOverlay()
+        self._overlay_version = None
+        self._last_display_time = None
 
     def run_monitoring(self):
         """Starts the main monitoring loop."""
-        video_capture = cv2.VideoCapture(self.video_source)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            roster_loading = None
+            if self.face_manager is None:
+                roster_loading = executor.submit(self._load_face_manager)
+            video_capture = executor.submit(self._open_video_source).result()
+            if roster_loading is not None:
+                self.face_manager = roster_loading.result()
+                self._select_roster()
         if not video_capture.isOpened():
             print(f"ERROR: Cannot open video source: {self.video_source}")
             return
+        self._open_session_logs()
 
+        # Photos served from the encoding cache never touch dlib, so load its models while monitoring starts.
+        preload_in_background(face_recognition)
+        if self.startup_report:
+            print_startup_report()
+
+        if self.num_workers > 0:
+            if self.face_detector is not None:
+                print("INFO: Recognition workers scan whole frames; region-of-interest detection is not used.")
+            self._worker_pool = RecognitionWorkerPool(self.num_workers)
+        try:
+            if self.headless:
+                self._run_headless(video_capture)
+            elif self.pipelined:
+                pipeline = FramePipeline(
+                    self, video_capture, BEHAVIOR_ANALYSIS_INTERVAL,
+                    max_in_flight=self.max_in_flight,
+                    # Only live cameras can outrun us; frames of a video file are never dropped.
+                    drop_stale_frames=self._is_live_source())
+                pipeline.run()
+            else:
+                self._run_serial(video_capture)
+        except KeyboardInterrupt:
+            print("INFO: Ctrl+C pressed. Shutting down...")
+        finally:
+            self._shutdown_worker_pool()
+
+        session_end = self.student_tracker.current_time()
+        video_capture.release()
+        if self.metrics.enabled:
+            log_metrics([self.metrics])
+        if not self.headless:
+            cv2.destroyAllWindows()
+        self._write_report(session_end)
+
+    def _write_report(self, session_end=None):
+        """Ends the session and writes the final report, built from the event log when there is one."""
+        self.behavior_engine.close()
+        self._apply_behavior_results()
+        if self.detection_log is not None:
+            self.detection_log.close()
+        with self._state_lock:
+            self.student_tracker.close()
+        if self.event_log_path:
+            student_data = load_event_log(self.event_log_path)
+        else:
+            student_data = self.student_tracker.get_all_students_data()
+        generate_csv_report(student_data, report_time=session_end, report_name=self.report_name,
+                            attendance_db=self.attendance_db, electives=self.session_electives, room=self.room,
+                            session_name=self.session_name)
+
+    def _open_session_logs(self):
+        """Opens the event log and, if enabled, the detection log of a session that is about to start."""
+        self.session_name = f"{self.report_name}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        if self.event_log:
+            self.event_log_path = f"{self.session_name}.events.jsonl"
+            self._event_sink = ReportSink(self.event_log_path)
+            self.student_tracker.set_sink(self._event_sink)
+            self._log_session_details()
+        if self.record_detections:
+            self.detection_log = DetectionLogWriter(f"{self.session_name}.detections", source=self.video_source)
+
+    def _log_session_details(self):
+        """
+        Logs the session's electives and room, which --summarize stores with a rebuilt report.
+        An empty list is logged too, so it replaces electives logged for an earlier roster.
+        """
+        if self._event_sink is not None:
+            self._event_sink.emit('session', self.student_tracker.current_time(),
+                                  electives=sorted(self.session_electives or ()), room=self.room)
+
+    def _select_roster(self, when=None):
+        """Narrows matching to the students expected in the session at `when` (default: now) when they are known."""
+        electives = self.electives
+        if not electives and self.timetable and self.room is not None:
+            electives = expected_electives(self.timetable, self.room, when)
+            self._roster_electives = electives
+            if not electives:
+                print(f"INFO: Nothing is timetabled in room {self.room} for this session; "
+                      "matching against the full roster.")
+        roster = self.face_manager
+        if electives:
+            roster = self.face_manager.session_roster(electives)
+            print(f"INFO: Matching {len(roster.expected.known_face_metadata)} expected students "
+                  f"({', '.join(sorted(electives))}) first and the full roster of "
+                  f"{len(self.face_manager.known_face_metadata)} only for visitors.")
+        if self.recognition_cache is not None:
+            # Decisions made against the previous roster may not hold for this one
+            self.recognition_cache.clear()
+            roster = CachedRoster(roster, self.recognition_cache, self.metrics)
+        self.roster = roster
+        # Every elective matched during the session is recorded, also when the timetable slot changed
+        if electives:
+            self.session_electives = (self.session_electives or set()) | set(electives)
+        self._log_session_details()
+
+    def _follow_timetable(self):
+        """Re-selects the roster when the timetable expects other electives than it was selected for."""
+        if self.electives or not self.timetable or self.room is None or self.face_manager is None:
+            return
+        now = self._clock()
+        if self._next_timetable_check is not None and now < self._next_timetable_check:
+            return
+        self._next_timetable_check = now + TIMETABLE_CHECK_INTERVAL
+        when = self.student_tracker.current_time()
+        if expected_electives(self.timetable, self.room, when) != self._roster_electives:
+            self._select_roster(when)
+
+    def _load_face_manager(self):
+        with timed_phase('load roster'):
+            return FaceManager()
+
+    def _open_video_source(self):
+        with timed_phase('open video source'):
+            return cv2.VideoCapture(self.video_source)
+
+    def _run_serial(self, video_capture):
+        """Runs capture, recognition, analysis and display one after another on this thread."""
         frame_count = 0
         while True:
-            ret, frame = video_capture.read()
+            with self.metrics.stage('decode'):
+                ret, frame = video_capture.read()
             if not ret:
                 print("INFO: End of video stream.")
                 break
+            self.metrics.count('frames')
 
-            small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
-            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+            rgb_small_frame = self._prepare_frame(frame)
             self.frame_buffer.append(rgb_small_frame)
 
-            if frame_count % FRAME_PROCESS_INTERVAL == 0:
-                self._process_frame(rgb_small_frame)
+            if self.scheduler.should_process(rgb_small_frame):
+                self._recognize(rgb_small_frame)
+            else:
+                self.metrics.count('frames_skipped')
+                if self._worker_pool is not None:
+                    self._apply_worker_results()
+                self._refresh_tracked_presence()
 
-            if frame_count % BEHAVIOR_ANALYSIS_INTERVAL == 0 and self.frame_buffer:
+            if frame_count % BEHAVIOR_ANALYSIS_INTERVAL == 0 and len(self.frame_buffer):
                 self._analyze_behavior_in_frame()
 
-            display_frame = self._visualize_data(frame)
-            cv2.imshow('StudyGuard - AI Classroom Monitoring', display_frame)
+            with self.metrics.stage('display'):
+                if self._should_display():
+                    cv2.imshow(WINDOW_NAME, self._visualize_data(frame))
+                key = cv2.waitKey(1)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if key & 0xFF == ord('q'):
                 print("INFO: 'q' pressed. Shutting down...")
                 break
 
             frame_count += 1
 
-        video_capture.release()
-        cv2.destroyAllWindows()
-        generate_csv_report(self.student_tracker.get_all_students_data())
+    def _run_headless(self, video_capture):
+        """
+        Processes a video as fast as possible without any GUI work.
+
+        Every frame is grabbed, but only frames needed for recognition or the behavior
+        buffer are decoded. Session times follow the position in the video.
+        """
+        if not self._is_live_source():
+            self._start_video_clock(video_capture)
+        if self.pipelined:
+            print("INFO: Headless mode runs the serial loop; ignoring --pipelined.")
+
+        frame_count = 0
+        while True:
+            with self.metrics.stage('grab'):
+                grabbed = video_capture.grab()
+            if not grabbed:
+                break
+            self.metrics.count('frames')
+            scan_every_frame = self.scheduler.needs_every_frame
+            recognize = False if scan_every_frame else self.scheduler.should_process(None)
+
+            if scan_every_frame or recognize or self.frame_buffer.wants_next():
+                with self.metrics.stage('decode'):
+                    ret, frame = video_capture.retrieve()
+                if not ret:
+                    break
+                rgb_small_frame = self._prepare_frame(frame)
+                self.frame_buffer.append(rgb_small_frame)
+                if scan_every_frame:
+                    recognize = self.scheduler.should_process(rgb_small_frame)
+                if recognize:
+                    self._recognize(rgb_small_frame)
+            else:
+                self.metrics.count('frames_not_decoded')
+                self.frame_buffer.skip()
+
+            if not recognize:
+                self.metrics.count('frames_skipped')
+                if self._worker_pool is not None:
+                    self._apply_worker_results()
+                self._refresh_tracked_presence()
+
+            if frame_count % BEHAVIOR_ANALYSIS_INTERVAL == 0 and len(self.frame_buffer):
+                self._analyze_behavior_in_frame()
+
+            frame_count += 1
+        print(f"INFO: End of video stream after {frame_count} frames.")
+
+    def _start_video_clock(self, video_capture):
+        """
+        Anchors session time to the recording. The file's modification time is taken as
+        the end of the recording, so the session started one video length earlier.
+        """
+        fps = video_capture.get(cv2.CAP_PROP_FPS)
+        total_frames = video_capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        duration = total_frames / fps if fps > 0 and total_frames > 0 else 0.0
+        try:
+            recorded_until = datetime.fromtimestamp(os.path.getmtime(self.video_source))
+        except (OSError, TypeError):
+            recorded_until = datetime.now()
+        recorded_from = recorded_until - timedelta(seconds=duration)
+        self._clock = lambda: video_capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        self.student_tracker.set_clock(self._clock, recorded_from)
+        # The roster was selected for the time of the audit; select it again for the time of the recording
+        self._next_timetable_check = None
+        self.session_electives = None
+        if self.face_manager is not None:
+            self._select_roster(when=recorded_from)
+
+    def _prepare_frame(self, frame):
+        """Downscales a captured BGR frame to half size and converts it to RGB."""
+        with self.metrics.stage('prepare'):
+            small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+            return cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+
+    def _is_live_source(self):
+        """Camera indices are live sources; anything else is a video file or stream URL."""
+        return isinstance(self.video_source, int)
+
+    def _recognize(self, frame):
+        """Runs recognition on a frame, either inline or through the worker pool."""
+        started_at = time.perf_counter()
+        self._follow_timetable()
+        self._recognition_frame_size = frame.shape[:2]
+        if self._worker_pool is None:
+            self._process_frame(frame)
+        else:
+            # A live camera skips the frame when every worker is busy, a video file waits for a free slot.
+            if not self._worker_pool.submit(frame, block=not self._is_live_source()):
+                self.metrics.count('frames_dropped')
+            self._apply_worker_results()
+        duration = time.perf_counter() - started_at
+        self.metrics.count('recognition_passes')
+        self.metrics.observe_stage('recognition', duration)
+        self.scheduler.record_pass(duration, inline=not self.pipelined)
+
+    def _apply_worker_results(self, block=False):
+        """Applies finished worker results to the tracker in the order their frames were captured."""
+        for face_locations, face_encodings in self._worker_pool.collect(block=block):
+            self.metrics.observe_faces(len(face_locations))
+            self._record_detections(face_locations, face_encodings)
+            if self.face_tracks is None:
+                self._update_presence(face_encodings)
+            else:
+                self._update_tracks(face_locations, face_encodings=face_encodings)
+
+    def _shutdown_worker_pool(self):
+        """Applies any outstanding worker results and stops the pool."""
+        if self._worker_pool is None:
+            return
+        self._apply_worker_results(block=True)
+        self._worker_pool.close()
+        self._worker_pool = None
 
     def _process_frame(self, frame):
         """Processes a single frame for face detection and recognition."""
-        face_locations = face_recognition.face_locations(frame)
-        face_encodings = face_recognition.face_encodings(frame, face_locations)
+        with self.metrics.stage('detect'):
+            if self.face_detector is None:
+                face_locations = face_recognition.face_locations(frame)
+            else:
+                face_locations = self.face_detector.detect(frame)
+        self.metrics.observe_faces(len(face_locations))
+        face_encodings = None
+        if self.detection_log is not None:
+            # The log needs every face's encoding, not only those of tracks due for identification
+            with self.metrics.stage('encode'):
+                face_encodings = face_recognition.face_encodings(frame, face_locations)
+            self._record_detections(face_locations, face_encodings)
+        if self.face_tracks is not None:
+            self._update_tracks(face_locations, frame=frame, face_encodings=face_encodings)
+            return
+        if face_encodings is None:
+            with self.metrics.stage('encode'):
+                face_encodings = face_recognition.face_encodings(frame, face_locations)
+        self._update_presence(face_encodings)
 
-        current_frame_roll_nos = set()
+    def _record_detections(self, face_locations, face_encodings):
+        """Appends one recognition pass to the detection log, if one is being recorded."""
+        if self.detection_log is not None:
+            self.detection_log.record(self.student_tracker.current_time().timestamp(), face_locations, face_encodings)
+
+    def replay_detections(self, path):
+        """
+        Rebuilds a session from a detection log instead of video: matching, tracking and the
+        report are re-run on the recorded face boxes and encodings, so no frame is decoded and
+        no face is detected. Behavior is not re-analyzed.
+
+        Args:
+            path (str): A .detections file recorded with `detection_log=True`.
+        """
+        log = DetectionLog(path)
+        if not len(log):
+            print(f"ERROR: No recognition passes recorded in {path}")
+            return
+        print(f"INFO: Replaying {len(log)} recognition passes recorded from {log.source}...")
+        replay_time = [log.start_time]
+        self._clock = lambda: replay_time[0]
+        self.student_tracker.set_clock(self._clock, datetime.fromtimestamp(log.start_time))
+        self._open_session_logs()
+        if self.face_manager is None:
+            self.face_manager = self._load_face_manager()
+        self.session_electives = None
+        self._select_roster(when=datetime.fromtimestamp(log.start_time))
+
+        for timestamp, face_locations, face_encodings in log.passes():
+            replay_time[0] = timestamp
+            self._follow_timetable()
+            self.metrics.count('recognition_passes')
+            self.metrics.observe_faces(len(face_locations))
+            if self.face_tracks is None:
+                self._update_presence(face_encodings)
+            else:
+                self._update_tracks(face_locations, face_encodings=face_encodings)
 
-        for face_encoding in face_encodings:
-            match_found, metadata = self.face_manager.find_match(face_encoding, FACE_MATCH_TOLERANCE)
-            
-            if match_found:
+        session_end = self.student_tracker.current_time()
+        if self.metrics.enabled:
+            log_metrics([self.metrics])
+        self._write_report(session_end)
+
+    def _update_presence(self, face_encodings):
+        """Matches the encodings of one frame against the roster and updates the tracker."""
+        with self.metrics.stage('match'):
+            matches = self.roster.find_matches(face_encodings, self.match_tolerance)
+        self._mark_present([metadata for match_found, metadata in matches if match_found])
+
+    def _update_tracks(self, face_locations, frame=None, face_encodings=None):
+        """
+        Associates detections with face tracks and identifies only the tracks that need it.
+
+        Encodings are computed from `frame` for those tracks alone, unless the worker pool
+        has already supplied `face_encodings` for every detection.
+        """
+        now = self._clock()
+        tracks = self.face_tracks.associate(face_locations)
+        pending = [index for index, track in enumerate(tracks) if self.face_tracks.needs_identification(track, now)]
+
+        if pending:
+            if face_encodings is None:
+                with self.metrics.stage('encode'):
+                    pending_encodings = face_recognition.face_encodings(
+                        frame, [face_locations[index] for index in pending])
+            else:
+                pending_encodings = [face_encodings[index] for index in pending]
+            pending_set = set(pending)
+            claimed_roll_nos = {track.roll_no for index, track in enumerate(tracks)
+                                if index not in pending_set and track.roll_no is not None}
+            with self.metrics.stage('match'):
+                matches = self.roster.find_matches(pending_encodings, self.match_tolerance,
+                                                   exclude_roll_nos=claimed_roll_nos)
+            for index, (match_found, metadata) in zip(pending, matches):
+                self.face_tracks.identify(tracks[index], metadata if match_found else None, now)
+
+        self._mark_present([track.metadata for track in tracks if track.metadata is not None])
+
+    def _mark_present(self, matched_metadata):
+        """Marks the matched students as present and everyone else as absent."""
+        current_frame_roll_nos = set()
+        with self._state_lock:
+            for metadata in matched_metadata:
                 roll_no = metadata['roll_no']
                 current_frame_roll_nos.add(roll_no)
                 self.student_tracker.update_student(roll_no, metadata)
 
-        self.student_tracker.mark_absent(current_frame_roll_nos)
+            self.student_tracker.mark_absent(current_frame_roll_nos)
+
+    def _refresh_tracked_presence(self):
+        """Keeps identified tracks present between recognition passes without any detection."""
+        if self.face_tracks is None:
+            return
+        with self._state_lock:
+            for track in self.face_tracks.identified_tracks():
+                self.student_tracker.update_student(track.roll_no, track.metadata)
 
     def _analyze_behavior_in_frame(self):
-        """Analyzes behavior for present students."""
-        action = self.behavior_analyzer.analyze_actions(self.frame_buffer)
-        self.student_tracker.record_behavior_for_present_students(action)
+        """Hands the buffered window to the behavior inference engine and applies finished results."""
+        with self.metrics.stage('behavior'):
+            self.behavior_engine.submit(self.frame_buffer.latest(), self._behavior_regions())
         self.frame_buffer.clear()
+        self._apply_behavior_results()
+
+    def _behavior_regions(self):
+        """
+        Returns the face box of every tracked student as fractions of the frame size, or None
+        when faces are not tracked, in which case behavior is classified for the whole frame.
+        """
+        if self.face_tracks is None or self._recognition_frame_size is None:
+            return None
+        height, width = self._recognition_frame_size
+        return {track.roll_no: (track.location[0] / height, track.location[1] / width,
+                                track.location[2] / height, track.location[3] / width)
+                for track in self.face_tracks.identified_tracks()}
+
+    def _apply_behavior_results(self):
+        """Records the behavior inference results that have finished since the last call."""
+        results = self.behavior_engine.collect()
+        if not results:
+            return
+        with self._state_lock:
+            for roll_no, action in results:
+                if roll_no is None:
+                    self.student_tracker.record_behavior_for_present_students(action)
+                else:
+                    self.student_tracker.record_behavior(roll_no, action)
+
+    def _should_display(self):
+        """Whether a frame is due on screen at the configured display frame rate."""
+        if not self.display_fps:
+            return True
+        now = time.monotonic()
+        if self._last_display_time is not None and now - self._last_display_time < 1.0 / self.display_fps:
+            return False
+        self._last_display_time = now
+        return True
 
     def _visualize_data(self, frame):
-        """Draws information on the display frame."""
-        y_offset = 30
-        for roll_no, data in self.student_tracker.get_all_students_data().items():
-            if data.get('present', False):
-                text = f"{data['metadata']['name']} ({roll_no}) - Present"
-                cv2.putText(frame, text, (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                y_offset += 20
-        return frame
+        """Draws information on the display frame, scaled to the display size if one is set."""
+        with self.metrics.stage('draw'):
+            if self.display_size is not None:
+                frame = cv2.resize(frame, self.display_size, interpolation=cv2.INTER_AREA)
+            version = self.student_tracker.presence_version
+            if version != self._overlay_version:
+                with self._state_lock:
+                    present_students = self.student_tracker.present_students()
+                self.overlay.update(present_students)
+                self._overlay_version = version
+            return self.overlay.draw(frame)
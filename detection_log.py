@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from startup import lazy_import
+np = lazy_import('numpy')
+
+# --- Constants ---
+FORMAT_NAME = 'studyguard-detections'
+FORMAT_VERSION = 1
+HEADER_SIZE = 512  # Bytes reserved for the JSON header; detection rows start right after it
+FLUSH_EVERY_PASSES = 50  # Buffered recognition passes that trigger a write
+FLUSH_INTERVAL = 5.0  # Seconds after which buffered passes are written even if few arrived
+NO_FACE_BOX = (-1, -1, -1, -1)  # Box of the placeholder row recorded for a pass that found no face
+
+
+def _row_dtype():
+    # One row per detected face; a pass without faces is kept as one placeholder row
+    return np.dtype([('time', '<f8'), ('pass', '<u4'), ('box', '<i4', (4,)), ('encoding', '<f4', (128,))])
+
+
+class DetectionLogWriter:
+    """
+    Append-only binary log of every recognition pass: its time, face boxes and 128-d
+    encodings.
+
+    The file is a fixed-size JSON header followed by fixed-size rows, so it can be
+    memory-mapped as one structured NumPy array. Rows are buffered and written in
+    batches; a crash loses at most the last few seconds, and a partly written row at
+    the end is ignored when the log is read.
+    """
+    def __init__(self, path, source=None, flush_every=FLUSH_EVERY_PASSES, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._passes = 0
+        self._buffer = []
+        self._buffered_passes = 0
+        self._last_flush = time.monotonic()
+        header = json.dumps({'format': FORMAT_NAME, 'version': FORMAT_VERSION, 'source': str(source)})
+        if len(header) >= HEADER_SIZE:
+            header = json.dumps({'format': FORMAT_NAME, 'version': FORMAT_VERSION})
+        self._file = open(path, 'wb')
+        self._file.write(header.ljust(HEADER_SIZE - 1).encode('utf-8') + b'\n')
+        print(f"INFO: Recording detections to {path}")
+
+    def record(self, timestamp, face_locations, face_encodings):
+        """
+        Buffers one recognition pass.
+
+        Args:
+            timestamp (float): Wall-clock time of the pass, in seconds since the epoch.
+            face_locations (list): Face boxes in (top, right, bottom, left) order.
+            face_encodings (list): One 128-d encoding per face box.
+        """
+        rows = np.zeros(max(1, len(face_locations)), dtype=_row_dtype())
+        rows['time'] = timestamp
+        rows['pass'] = self._passes
+        if len(face_locations):
+            rows['box'] = face_locations
+            rows['encoding'] = face_encodings
+        else:
+            rows['box'] = NO_FACE_BOX
+        self._buffer.append(rows)
+        self._passes += 1
+        self._buffered_passes += 1
+        if self._buffered_passes >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes all buffered passes to disk."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        try:
+            self._file.write(np.concatenate(self._buffer).tobytes())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer.clear()
+            self._buffered_passes = 0
+        except OSError as e:
+            print(f"ERROR: Could not write detections to {self.path}: {e}")
+
+    def close(self):
+        """Flushes remaining passes and closes the log."""
+        self.flush()
+        self._file.close()
+
+
+class DetectionLog:
+    """
+    Read-only, memory-mapped view of a log written by `DetectionLogWriter`.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = json.loads(f.read(HEADER_SIZE).decode('utf-8'))
+        if header.get('format') != FORMAT_NAME or header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} detection log")
+        self.source = header.get('source')
+        dtype = _row_dtype()
+        row_count = max(0, os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        if row_count:
+            self._rows = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(row_count,))
+            # Start of each pass's rows, plus the end of the last pass
+            pass_ids = self._rows['pass']
+            self._bounds = np.concatenate(([0], np.flatnonzero(pass_ids[1:] != pass_ids[:-1]) + 1, [row_count]))
+        else:
+            self._rows = np.zeros(0, dtype=dtype)
+            self._bounds = np.zeros(1, dtype=np.intp)
+
+    def __len__(self):
+        """Number of recognition passes in the log."""
+        return len(self._bounds) - 1
+
+    @property
+    def start_time(self):
+        return float(self._rows['time'][0]) if len(self._rows) else None
+
+    @property
+    def end_time(self):
+        return float(self._rows['time'][-1]) if len(self._rows) else None
+
+    def passes(self):
+        """
+        Yields the recorded passes in order.
+
+        Yields:
+            tuple: (timestamp, face locations as (top, right, bottom, left) tuples, (faces, 128) float32 encodings).
+        """
+        for start, end in zip(self._bounds[:-1].tolist(), self._bounds[1:].tolist()):
+            rows = self._rows[start:end]
+            faces = rows[rows['box'][:, 0] >= 0]
+            yield (float(rows['time'][0]), [tuple(box) for box in faces['box'].tolist()],
+                   np.asarray(faces['encoding']))
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import tempfile
+from startup import lazy_import
+np = lazy_import('numpy')
+
+# --- Constants ---
+MATRIX_FILENAME = 'face_encodings.npy'
+METADATA_FILENAME = 'face_encodings_meta.json'
+STORE_VERSION = 1
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    """Returns the hex SHA-1 digest of a file's contents."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _matrix_sha1(matrix):
+    """Returns the hex SHA-1 digest of an encoding matrix's values."""
+    return hashlib.sha1(np.ascontiguousarray(matrix, dtype=np.float64).tobytes()).hexdigest()
+
+
+class EncodingStore:
+    """
+    On-disk cache of student face encodings.
+
+    Encodings live in a single memory-mappable `.npy` matrix and a JSON sidecar
+    describes each row. An entry is keyed by image file name and is only reused
+    when both the image content hash and the student's database row are unchanged.
+    Images in which no face was found are cached too, so they are not re-encoded
+    on every start.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.matrix_path = os.path.join(cache_dir, MATRIX_FILENAME)
+        self.metadata_path = os.path.join(cache_dir, METADATA_FILENAME)
+        self._entries = {}
+        self._dirty = False
+
+    def load(self):
+        """Loads the cache from disk, discarding it if it is missing or inconsistent."""
+        self._entries = {}
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.metadata_path)):
+            return
+        try:
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Ignoring unreadable encoding cache in '{self.cache_dir}': {e}")
+            return
+
+        entries = metadata.get('entries', {})
+        matrix_sha1 = metadata.get('matrix_sha1')
+        if (metadata.get('version') != STORE_VERSION or matrix.shape[0] != metadata.get('rows')
+                or (matrix_sha1 is not None and matrix_sha1 != _matrix_sha1(matrix))):
+            print("WARNING: Encoding cache is out of date or inconsistent. Rebuilding it.")
+            self._dirty = True
+            return
+
+        for key, entry in entries.items():
+            index = entry['index']
+            encoding = np.array(matrix[index]) if index >= 0 else None
+            faces = entry.get('faces', 0 if encoding is None else 1)
+            self._entries[key] = {'hash': entry['hash'], 'row': entry['row'], 'encoding': encoding, 'faces': faces}
+        print(f"INFO: Loaded {len(self._entries)} cached encodings from {self.cache_dir}.")
+
+    def lookup(self, key, image_hash, row):
+        """
+        Looks up a cached encoding.
+
+        Returns:
+            tuple: (bool, ndarray or None) indicating a cache hit and the cached encoding,
+                   which is None for images in which no face was found.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry['hash'] != image_hash or entry['row'] != row:
+            return False, None
+        return True, entry['encoding']
+
+    def put(self, key, image_hash, row, encoding, faces=None):
+        """
+        Stores the encoding (or None if no face was found) for an image, and how many
+        faces were found in it.
+        """
+        if faces is None:
+            faces = 0 if encoding is None else 1
+        self._entries[key] = {'hash': image_hash, 'row': row, 'encoding': encoding, 'faces': faces}
+        self._dirty = True
+
+    def face_count(self, key):
+        """Returns the number of faces found in a cached image."""
+        return self._entries[key]['faces']
+
+    def prune(self, live_keys):
+        """Drops entries for images that are no longer part of the roster."""
+        stale_keys = set(self._entries) - set(live_keys)
+        for key in stale_keys:
+            del self._entries[key]
+        if stale_keys:
+            self._dirty = True
+            print(f"INFO: Dropped {len(stale_keys)} stale entries from the encoding cache.")
+
+    def save(self):
+        """Writes the cache back to disk if it changed since it was loaded."""
+        if not self._dirty:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        encodings = []
+        entries = {}
+        for key, entry in self._entries.items():
+            index = -1
+            if entry['encoding'] is not None:
+                index = len(encodings)
+                encodings.append(entry['encoding'])
+            entries[key] = {'hash': entry['hash'], 'row': entry['row'], 'index': index, 'faces': entry['faces']}
+        matrix = np.stack(encodings) if encodings else np.empty((0, 128), dtype=np.float64)
+        # The sidecar names its matrix by digest, so a matrix and sidecar saved by different writers are detected
+        metadata = {'version': STORE_VERSION, 'rows': len(encodings), 'matrix_sha1': _matrix_sha1(matrix),
+                    'entries': entries}
+
+        # Write both files under temporary names unique to this writer first, so a crash never leaves a
+        # half-written cache and concurrent writers never write into each other's files.
+        temporary_paths = []
+        try:
+            matrix_fd, matrix_tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=MATRIX_FILENAME, suffix='.tmp')
+            temporary_paths.append(matrix_tmp)
+            with os.fdopen(matrix_fd, 'wb') as f:
+                np.save(f, matrix)
+            metadata_fd, metadata_tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=METADATA_FILENAME, suffix='.tmp')
+            temporary_paths.append(metadata_tmp)
+            with os.fdopen(metadata_fd, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f)
+            os.replace(matrix_tmp, self.matrix_path)
+            os.replace(metadata_tmp, self.metadata_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"WARNING: Could not save encoding cache: {e}")
+            for path in temporary_paths:
+                if os.path.exists(path):
+                    os.remove(path)
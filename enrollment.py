@@ -0,0 +1,121 @@
+import json
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from startup import lazy_import
+face_recognition = lazy_import('face_recognition')
+
+# --- Constants ---
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+MIN_PARALLEL_PHOTOS = 8  # Fewer uncached photos than this are encoded in-process; workers would take longer to start
+REPORT_FILENAME = 'enrollment_report.json'
+
+
+def index_student_images(images_dir, roll_nos):
+    """
+    Scans the image directory once and groups the photos by roll number.
+
+    A student's photos are named `<roll_no>.<ext>`, and further photos of the same
+    student `<roll_no>_<n>.<ext>`, e.g. 101.jpg, 101_2.jpg and 101_3.png. A name that
+    is itself a roll number always belongs to that student, so with roll numbers like
+    2023_12, 2023_12.jpg is that student's photo and not a further photo of 2023.
+
+    Args:
+        images_dir (str): Directory holding the student photos.
+        roll_nos (iterable): Roll numbers of the students in the database.
+
+    Returns:
+        dict: Sorted lists of image file names keyed by roll number.
+    """
+    roll_nos = set(roll_nos)
+    index = {}
+    for image_file in sorted(os.listdir(images_dir)):
+        stem, extension = os.path.splitext(image_file)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        prefix, separator, suffix = stem.rpartition('_')
+        if stem not in roll_nos and separator and suffix.isdigit():
+            stem = prefix
+        index.setdefault(stem, []).append(image_file)
+    return index
+
+
+def encode_photo(image_path):
+    """
+    Detects and encodes the faces in one student photo.
+
+    Returns:
+        tuple: (encoding or None, number of faces found, error message or None). With several
+               faces, the encoding is that of the largest one, which is normally the student.
+    """
+    try:
+        image = face_recognition.load_image_file(image_path)
+        locations = face_recognition.face_locations(image)
+        if not locations:
+            return None, 0, None
+        largest = max(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+        return face_recognition.face_encodings(image, [largest])[0], len(locations), None
+    except Exception as e:
+        return None, 0, str(e)
+
+
+def encode_photos(image_paths, workers=None):
+    """
+    Encodes photos across worker processes, returning `encode_photo` results in input order.
+
+    Args:
+        image_paths (list): Paths of the photos to encode.
+        workers (int): Number of processes; defaults to one per CPU core. 1 encodes in this process.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(image_paths))
+    if workers <= 1 or len(image_paths) < MIN_PARALLEL_PHOTOS:
+        return [encode_photo(image_path) for image_path in image_paths]
+    print(f"INFO: Encoding {len(image_paths)} photos with {workers} processes...")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as executor:
+        return list(executor.map(encode_photo, image_paths, chunksize=max(1, len(image_paths) // (4 * workers))))
+
+
+class EnrollmentReport:
+    """
+    Outcome of enrolling the student database: which students could not be enrolled and
+    which photos need attention.
+    """
+    def __init__(self):
+        self.students = 0
+        self.enrolled_students = 0
+        self.encoded_photos = 0
+        self.reused_photos = 0
+        self.missing_photos = []  # Roll numbers without any photo
+        self.no_face = []  # {'roll_no', 'photo'}
+        self.multiple_faces = []  # {'roll_no', 'photo', 'faces'}
+        self.errors = []  # {'roll_no', 'photo', 'error'}
+
+    def to_dict(self):
+        return {
+            'students': self.students,
+            'enrolled_students': self.enrolled_students,
+            'encoded_photos': self.encoded_photos,
+            'reused_photos': self.reused_photos,
+            'missing_photos': self.missing_photos,
+            'no_face': self.no_face,
+            'multiple_faces': self.multiple_faces,
+            'errors': self.errors,
+        }
+
+    def save(self, path):
+        """Writes the report as JSON."""
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2)
+        except OSError as e:
+            print(f"WARNING: Could not save the enrollment report: {e}")
+
+    def print_summary(self, path=None):
+        print(f"INFO: Enrolled {self.enrolled_students} of {self.students} students "
+              f"({self.encoded_photos} photos encoded, {self.reused_photos} reused from the cache).")
+        problems = (len(self.missing_photos), len(self.no_face), len(self.multiple_faces), len(self.errors))
+        if any(problems):
+            where = f" See {path}." if path else ""
+            print("WARNING: {} students without a photo, {} photos without a face, {} photos with several faces, "
+                  "{} unreadable photos.{}".format(*problems, where))
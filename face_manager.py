@@ -1,8 +1,11 @@
 
 import os
-import pandas as pd
-import face_recognition
-import numpy as np
+from startup import lazy_import, timed_phase
+from encoding_store import EncodingStore, file_sha1
+from enrollment import EnrollmentReport, encode_photos, index_student_images, REPORT_FILENAME
+pd = lazy_import('pandas')
+face_recognition = lazy_import('face_recognition')
+np = lazy_import('numpy')
 
 # --- Constants ---
 # Get the absolute path of the directory where this script is located
@@ -11,52 +14,163 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 # Construct paths relative to the script's location for robustness
 STUDENT_DB_CSV = os.path.join(script_dir, 'students_db.csv')
 STUDENT_IMAGES_DIR = os.path.join(script_dir, 'student_images/')
+ENCODING_CACHE_DIR = os.path.join(script_dir, 'encoding_cache')
+VISITOR_TOLERANCE_MARGIN = 0.05  # Visitors from outside a session's roster must match this much more closely
 
 class FaceManager:
     """
     Loads, stores, and matches known student faces.
     """
-    def __init__(self):
+    def __init__(self, student_db_csv=STUDENT_DB_CSV, images_dir=STUDENT_IMAGES_DIR, cache_dir=ENCODING_CACHE_DIR,
+                 enrollment_workers=None):
+        self.student_db_csv = student_db_csv
+        self.images_dir = images_dir
+        self.cache_dir = cache_dir
+        self.enrollment_workers = enrollment_workers
+        self.enrollment_report = None
         self.known_face_encodings = []
         self.known_face_metadata = []
-        self._load_student_database()
-        self._encode_known_faces()
+        with timed_phase('read student database'):
+            self._load_student_database()
+        with timed_phase('encode student photos'):
+            self._encode_known_faces()
+        self._build_roster_matrix()
+
+    @classmethod
+    def from_encodings(cls, encodings, metadata):
+        """
+        Creates a FaceManager from precomputed encodings, without reading the database or any photos.
+
+        Args:
+            encodings (list): 128-d face encodings, one per roster entry.
+            metadata (list): The matching student metadata dicts ('roll_no', 'name', 'elective').
+        """
+        face_manager = cls.__new__(cls)
+        face_manager.student_db_csv = face_manager.images_dir = face_manager.cache_dir = None
+        face_manager.enrollment_workers = face_manager.enrollment_report = None
+        face_manager.known_face_encodings = list(encodings)
+        face_manager.known_face_metadata = list(metadata)
+        face_manager._build_roster_matrix()
+        return face_manager
 
     def _load_student_database(self):
         """Loads student information from the CSV database."""
         try:
-            self.student_db = pd.read_csv(STUDENT_DB_CSV)
-            print(f"INFO: Successfully loaded {len(self.student_db)} students from {STUDENT_DB_CSV}.")
+            self.student_db = pd.read_csv(self.student_db_csv)
+            print(f"INFO: Successfully loaded {len(self.student_db)} students from {self.student_db_csv}.")
         except FileNotFoundError:
-            print(f"ERROR: Student database '{STUDENT_DB_CSV}' not found. Please create it.")
+            print(f"ERROR: Student database '{self.student_db_csv}' not found. Please create it.")
             exit()
 
     def _encode_known_faces(self):
-        """Loads student images and creates facial encodings."""
+        """
+        Loads student images and creates facial encodings.
+
+        The image directory is indexed once, photos whose encoding is not cached are
+        encoded in parallel, and problems are collected in an enrollment report.
+        """
         print("INFO: Encoding student faces from images...")
-        if not os.path.exists(STUDENT_IMAGES_DIR):
-             print(f"ERROR: Image directory '{STUDENT_IMAGES_DIR}' not found. Please create it.")
+        if not os.path.exists(self.images_dir):
+             print(f"ERROR: Image directory '{self.images_dir}' not found. Please create it.")
              exit()
 
-        for _, row in self.student_db.iterrows():
-            roll_no = str(row['roll_no'])
-            image_file = next((f for f in os.listdir(STUDENT_IMAGES_DIR) if f.startswith(roll_no + '.')), None)
+        store = EncodingStore(self.cache_dir)
+        store.load()
+        image_index = index_student_images(self.images_dir, self.student_db['roll_no'].astype(str))
+        report = EnrollmentReport()
+        photos = []  # (image file, metadata) of every photo of a student in the database
+        results = {}  # image file -> (encoding or None, number of faces, error message or None)
+        uncached = {}  # image file -> (image hash, cache row)
 
-            if image_file:
-                image_path = os.path.join(STUDENT_IMAGES_DIR, image_file)
+        for roll_no, name, elective in self.student_db[['roll_no', 'name', 'elective']].itertuples(index=False,
+                                                                                                 name=None):
+            roll_no = str(roll_no)
+            report.students += 1
+            if roll_no not in image_index:
+                report.missing_photos.append(roll_no)
+                continue
+            metadata = {'roll_no': roll_no, 'name': name, 'elective': elective}
+            cache_row = {key: str(value) for key, value in metadata.items()}
+            for image_file in image_index[roll_no]:
                 try:
-                    student_image = face_recognition.load_image_file(image_path)
-                    face_encodings = face_recognition.face_encodings(student_image)
-                    if face_encodings:
-                        self.known_face_encodings.append(face_encodings[0])
-                        self.known_face_metadata.append({'roll_no': roll_no, 'name': row['name'], 'elective': row['elective']})
-                    else:
-                        print(f"WARNING: No face found in image for Roll No: {roll_no} ({image_file}).")
-                except Exception as e:
-                    print(f"ERROR: Could not process image {image_path}: {e}")
+                    image_hash = file_sha1(os.path.join(self.images_dir, image_file))
+                except OSError as e:
+                    report.errors.append({'roll_no': roll_no, 'photo': image_file, 'error': str(e)})
+                    continue
+                photos.append((image_file, metadata))
+                cached, face_encoding = store.lookup(image_file, image_hash, cache_row)
+                if cached:
+                    results[image_file] = (face_encoding, store.face_count(image_file), None)
+                    report.reused_photos += 1
+                else:
+                    uncached[image_file] = (image_hash, cache_row)
+
+        image_files = list(uncached)
+        encoded = encode_photos([os.path.join(self.images_dir, image_file) for image_file in image_files],
+                                self.enrollment_workers)
+        for image_file, (face_encoding, faces, error) in zip(image_files, encoded):
+            if error is None:
+                store.put(image_file, *uncached[image_file], face_encoding, faces)
+                report.encoded_photos += 1
+            results[image_file] = (face_encoding, faces, error)
+
+        enrolled = set()
+        for image_file, metadata in photos:
+            face_encoding, faces, error = results[image_file]
+            roll_no = metadata['roll_no']
+            if error is not None:
+                report.errors.append({'roll_no': roll_no, 'photo': image_file, 'error': error})
+            elif face_encoding is None:
+                report.no_face.append({'roll_no': roll_no, 'photo': image_file})
             else:
-                print(f"WARNING: No image file found for Roll No: {roll_no}.")
-        print(f"INFO: Encoded {len(self.known_face_encodings)} faces.")
+                if faces > 1:
+                    report.multiple_faces.append({'roll_no': roll_no, 'photo': image_file, 'faces': faces})
+                self.known_face_encodings.append(face_encoding)
+                self.known_face_metadata.append(metadata)
+                enrolled.add(roll_no)
+        report.enrolled_students = len(enrolled)
+
+        store.prune(image_file for image_file, _ in photos)
+        store.save()
+        report_path = os.path.join(self.cache_dir, REPORT_FILENAME)
+        report.save(report_path)
+        report.print_summary(report_path)
+        self.enrollment_report = report
+
+    def _build_roster_matrix(self):
+        """Stacks the known encodings into a contiguous float32 matrix with precomputed squared norms."""
+        self._roster_matrix = np.ascontiguousarray(
+            np.asarray(self.known_face_encodings, dtype=np.float32).reshape(-1, 128))
+        self._roster_sq_norms = np.einsum('ij,ij->i', self._roster_matrix, self._roster_matrix)
+        self._rows_by_elective = {}
+        self._rows_by_roll_no = {}
+        for row, metadata in enumerate(self.known_face_metadata):
+            self._rows_by_elective.setdefault(str(metadata['elective']), []).append(row)
+            self._rows_by_roll_no.setdefault(metadata['roll_no'], []).append(row)
+
+    def distance_to(self, face_encoding, roll_no):
+        """Returns the face distance between an encoding and the nearest enrolled photo of a student."""
+        rows = self._rows_by_roll_no.get(roll_no)
+        if not rows:
+            return float('inf')
+        query = np.asarray(face_encoding, dtype=np.float32).reshape(128)
+        return float(np.linalg.norm(self._roster_matrix[rows] - query, axis=1).min())
+
+    def session_roster(self, electives):
+        """
+        Narrows matching to the students of the given electives, e.g. those timetabled in a room.
+
+        Args:
+            electives (iterable): Elective names expected in the session.
+
+        Returns:
+            SessionRoster: A roster with the expected students as the primary matching set and
+                           this full roster as the fallback for visitors.
+        """
+        rows = sorted(row for elective in set(electives) for row in self._rows_by_elective.get(str(elective), []))
+        expected = FaceManager.from_encodings([self.known_face_encodings[row] for row in rows],
+                                              [self.known_face_metadata[row] for row in rows])
+        return SessionRoster(expected, self)
 
     def find_match(self, face_encoding, tolerance=0.6):
         """
@@ -64,15 +178,80 @@ class FaceManager:
         Returns:
             tuple: (bool, dict) indicating if a match was found and the corresponding student metadata.
         """
-        if not self.known_face_encodings:
-            return False, None
-            
-        matches = face_recognition.compare_faces(self.known_face_encodings, face_encoding, tolerance=tolerance)
-        face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
-        
-        best_match_index = np.argmin(face_distances)
-        if matches[best_match_index]:
-            return True, self.known_face_metadata[best_match_index]
-            
-        return False, None
+        return self.find_matches([face_encoding], tolerance)[0]
+
+    def find_matches(self, face_encodings, tolerance=0.6, exclude_roll_nos=()):
+        """
+        Matches every face encoding of a frame against the roster in one pass.
+
+        Distances come from a single query-by-roster matrix product. Faces are then
+        assigned greedily in order of increasing distance, so no two faces in the
+        same frame can claim the same student.
+
+        Args:
+            face_encodings (list): The encodings of the faces to identify.
+            tolerance (float): Maximum face distance that counts as a match.
+            exclude_roll_nos (iterable): Roll numbers already claimed by other faces in the frame.
+
+        Returns:
+            list: One (bool, dict) tuple per input encoding, as returned by `find_match`.
+        """
+        results = [(False, None)] * len(face_encodings)
+        if not len(face_encodings) or not len(self._roster_matrix):
+            return results
+
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, 128)
+        query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+        sq_distances = query_sq_norms[:, None] + self._roster_sq_norms[None, :] - 2.0 * (queries @ self._roster_matrix.T)
+
+        face_indices, roster_indices = np.nonzero(sq_distances <= tolerance * tolerance)
+        order = np.argsort(sq_distances[face_indices, roster_indices], kind='stable')
+
+        taken_roll_nos = set(exclude_roll_nos)
+        for face_index, roster_index in zip(face_indices[order].tolist(), roster_indices[order].tolist()):
+            metadata = self.known_face_metadata[roster_index]
+            if results[face_index][0] or metadata['roll_no'] in taken_roll_nos:
+                continue
+            results[face_index] = (True, metadata)
+            taken_roll_nos.add(metadata['roll_no'])
+        return results
+
+
+class SessionRoster:
+    """
+    The roster of one session: the expected students first, the whole institution second.
+
+    Faces are matched against the small set of expected students. Only faces that match
+    none of them are compared with the full roster, with a slightly stricter tolerance,
+    so visitors are still recognized while lookalikes from other classes rarely win.
+    """
+    def __init__(self, expected, full_roster):
+        self.expected = expected
+        self.full_roster = full_roster
+        self.visitor_matches = 0
+
+    def distance_to(self, face_encoding, roll_no):
+        """Returns the face distance between an encoding and the nearest enrolled photo of a student."""
+        return self.full_roster.distance_to(face_encoding, roll_no)
+
+    def find_match(self, face_encoding, tolerance=0.6):
+        """Matches one face encoding; see `FaceManager.find_match`."""
+        return self.find_matches([face_encoding], tolerance)[0]
+
+    def find_matches(self, face_encodings, tolerance=0.6, exclude_roll_nos=()):
+        """Matches the faces of a frame, as `FaceManager.find_matches` does."""
+        results = self.expected.find_matches(face_encodings, tolerance, exclude_roll_nos)
+        unmatched = [index for index, (match_found, _) in enumerate(results) if not match_found]
+        if not unmatched:
+            return results
 
+        claimed_roll_nos = set(exclude_roll_nos)
+        claimed_roll_nos.update(metadata['roll_no'] for match_found, metadata in results if match_found)
+        visitors = self.full_roster.find_matches([face_encodings[index] for index in unmatched],
+                                                 tolerance - VISITOR_TOLERANCE_MARGIN,
+                                                 exclude_roll_nos=claimed_roll_nos)
+        for index, match in zip(unmatched, visitors):
+            if match[0]:
+                results[index] = match
+                self.visitor_matches += 1
+        return results
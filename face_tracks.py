@@ -0,0 +1,104 @@
+import itertools
+from utils import box_iou
+
+# --- Constants ---
+CENTROID_MATCH_RATIO = 0.5  # Without box overlap, centroids closer than this fraction of the face width still match
+MAX_MISSED_PASSES = 3  # Recognition passes a track survives without a matching detection
+REVERIFY_CONFIDENCE = 0.5  # Tracks whose confidence decays below this are re-identified
+REVERIFY_INTERVAL = 30.0  # Seconds after which even a stable track is re-identified
+
+
+def _centroid_distance_ratio(box_a, box_b):
+    """Distance between box centres relative to the width of the first box."""
+    centre_ay, centre_ax = (box_a[0] + box_a[2]) / 2.0, (box_a[1] + box_a[3]) / 2.0
+    centre_by, centre_bx = (box_b[0] + box_b[2]) / 2.0, (box_b[1] + box_b[3]) / 2.0
+    width = max(1, box_a[1] - box_a[3])
+    return ((centre_ay - centre_by) ** 2 + (centre_ax - centre_bx) ** 2) ** 0.5 / width
+
+
+class FaceTrack:
+    """
+    A face followed across recognition passes, with the student it was identified as.
+    """
+    def __init__(self, track_id, location):
+        self.track_id = track_id
+        self.location = location
+        self.metadata = None
+        self.confidence = 0.0
+        self.last_verified = None
+        self.missed_passes = 0
+
+    @property
+    def roll_no(self):
+        return self.metadata['roll_no'] if self.metadata else None
+
+
+class FaceTrackManager:
+    """
+    Associates face detections across recognition passes so that only new,
+    unidentified or doubtful faces need to be encoded and matched.
+
+    Detections are matched to existing tracks by box overlap, falling back to centroid
+    distance. A track's confidence decays with every pass in which it is carried over
+    by position alone, and it is re-identified once the confidence is low or the last
+    verification is older than `REVERIFY_INTERVAL`.
+    """
+    def __init__(self):
+        self._tracks = []
+        self._track_ids = itertools.count()
+
+    def associate(self, face_locations):
+        """
+        Matches the detections of a pass to tracks, creating tracks for new faces
+        and dropping tracks that have not been seen for too long.
+
+        Returns:
+            list: The track for each entry of `face_locations`.
+        """
+        candidates = []
+        for track_index, track in enumerate(self._tracks):
+            for face_index, location in enumerate(face_locations):
+                overlap = box_iou(track.location, location)
+                if overlap > 0 or _centroid_distance_ratio(track.location, location) < CENTROID_MATCH_RATIO:
+                    candidates.append((overlap, track_index, face_index))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        assigned = [None] * len(face_locations)
+        matched_tracks = set()
+        for overlap, track_index, face_index in candidates:
+            if assigned[face_index] is not None or track_index in matched_tracks:
+                continue
+            track = self._tracks[track_index]
+            track.location = face_locations[face_index]
+            track.missed_passes = 0
+            # A well-overlapping box barely dents confidence, a centroid-only match halves it.
+            track.confidence *= 0.5 + 0.5 * overlap
+            assigned[face_index] = track
+            matched_tracks.add(track_index)
+
+        for track_index, track in enumerate(self._tracks):
+            if track_index not in matched_tracks:
+                track.missed_passes += 1
+        self._tracks = [track for track in self._tracks if track.missed_passes <= MAX_MISSED_PASSES]
+
+        for face_index, location in enumerate(face_locations):
+            if assigned[face_index] is None:
+                assigned[face_index] = FaceTrack(next(self._track_ids), location)
+                self._tracks.append(assigned[face_index])
+        return assigned
+
+    def needs_identification(self, track, now):
+        """Whether a track must be encoded and matched against the roster in this pass."""
+        return (track.metadata is None
+                or track.confidence < REVERIFY_CONFIDENCE
+                or now - track.last_verified > REVERIFY_INTERVAL)
+
+    def identify(self, track, metadata, now):
+        """Records the outcome of matching a track's encoding (metadata is None for no match)."""
+        track.metadata = metadata
+        track.confidence = 1.0 if metadata else 0.0
+        track.last_verified = now
+
+    def identified_tracks(self):
+        """Returns the tracks seen in the latest pass that are identified as a student."""
+        return [track for track in self._tracks if track.metadata is not None and track.missed_passes == 0]
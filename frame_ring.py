@@ -0,0 +1,81 @@
+from startup import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+class FrameRingBuffer:
+    """
+    Fixed-capacity, preallocated buffer of the most recent video frames.
+
+    Every frame is written twice, at slot `i` and at its mirror `i + capacity`, so the
+    last N frames always form one contiguous block of the backing array and can be
+    handed out as a view without copying. Frames are resized straight into their
+    slots, so no per-frame arrays are allocated once the buffer exists.
+    """
+    def __init__(self, capacity, stride=1, frame_size=None):
+        """
+        Args:
+            capacity (int): Number of frames kept, i.e. the longest clip that can be read back.
+            stride (int): Keep only every `stride`-th appended frame.
+            frame_size (tuple): (width, height) frames are resized to; None keeps the size of the first frame.
+        """
+        self.capacity = capacity
+        self.stride = stride
+        self.frame_size = frame_size
+        self._storage = None
+        self._next_slot = 0
+        self._count = 0
+        self._frames_offered = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, frame):
+        """Writes a frame into the next slot, overwriting the oldest one once the buffer is full."""
+        self._frames_offered += 1
+        if (self._frames_offered - 1) % self.stride:
+            return
+        if self._storage is None:
+            self._allocate(frame)
+
+        slot = self._storage[self._next_slot]
+        if frame.shape == slot.shape:
+            np.copyto(slot, frame)
+        else:
+            cv2.resize(frame, self.frame_size, dst=slot, interpolation=cv2.INTER_AREA)
+        np.copyto(self._storage[self._next_slot + self.capacity], slot)
+
+        self._next_slot = (self._next_slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def wants_next(self):
+        """Whether the next appended frame will be stored rather than skipped by the stride."""
+        return self._frames_offered % self.stride == 0
+
+    def skip(self):
+        """Accounts for a frame that was never decoded, keeping the stride aligned."""
+        self._frames_offered += 1
+
+    def latest(self, n=None):
+        """
+        Returns a read-only view of the last `n` frames (all buffered frames by default), oldest first.
+        """
+        n = self._count if n is None else min(n, self._count)
+        if n == 0:
+            return np.empty((0, 0, 0, 3), dtype=np.uint8)
+        end = self._next_slot + self.capacity
+        view = self._storage[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """Forgets the buffered frames without releasing the backing memory."""
+        self._next_slot = 0
+        self._count = 0
+        self._frames_offered = 0
+
+    def _allocate(self, frame):
+        if self.frame_size is None:
+            self.frame_size = (frame.shape[1], frame.shape[0])
+        width, height = self.frame_size
+        self._storage = np.empty((2 * self.capacity, height, width, frame.shape[2]), dtype=frame.dtype)
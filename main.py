@@ -1,6 +1,16 @@
 
 import argparse
-from controller import StudyGuardController
+import os
+from controller import StudyGuardController, MAX_IN_FLIGHT_FRAMES, BEHAVIOR_CLIP_LENGTH, FACE_MATCH_TOLERANCE
+from scheduler import AdaptiveScheduler
+from roi_detection import RegionOfInterestDetector, FULL_SCAN_EVERY
+from timetable import load_timetable, TIMETABLE_CSV
+from batch import process_videos
+from multi_room import MultiRoomServer, parse_room_sources
+from report_sink import load_event_log, load_session_details
+from utils import generate_csv_report
+from metrics import MetricsExporter, LOG_INTERVAL
+from attendance_store import ATTENDANCE_DB
 
 def main():
     """
@@ -13,7 +23,230 @@ def main():
         default='0',
         help="Path to a video file or camera index (e.g., '0' for the default webcam)."
     )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Run capture, recognition, behavior analysis and display as parallel pipeline stages."
+    )
+    parser.add_argument(
+        "--max_in_flight",
+        type=int,
+        default=MAX_IN_FLIGHT_FRAMES,
+        help="Number of frames that may queue between pipeline stages before stale ones are dropped."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of face recognition worker processes (0 runs recognition in the main process)."
+    )
+    parser.add_argument(
+        "--no_face_tracking",
+        action="store_true",
+        help="Re-identify every detected face on every recognition pass instead of tracking faces between passes."
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt how often recognition runs to scene motion and the measured cost of each pass."
+    )
+    parser.add_argument(
+        "--cpu_budget",
+        type=float,
+        default=None,
+        help="Fraction of one CPU core recognition may use, e.g. 0.5 (implies --adaptive)."
+    )
+    parser.add_argument(
+        "--target_fps",
+        type=float,
+        default=None,
+        help="Frame rate the monitoring loop should sustain (implies --adaptive)."
+    )
+    parser.add_argument(
+        "--clip_length",
+        type=int,
+        default=BEHAVIOR_CLIP_LENGTH,
+        help="Number of frames buffered for each behavior analysis window."
+    )
+    parser.add_argument(
+        "--clip_stride",
+        type=int,
+        default=None,
+        help="Buffer only every Nth frame for behavior analysis (default: every frame; in headless mode only "
+             "the frames the behavior model samples)."
+    )
+    parser.add_argument(
+        "--clip_size",
+        type=str,
+        default=None,
+        help="Resolution of buffered behavior frames as WIDTHxHEIGHT (default: half the capture resolution)."
+    )
+    parser.add_argument(
+        "--roi",
+        action="store_true",
+        help="Detect faces only around known positions, moving regions and watch regions, with periodic full scans."
+    )
+    parser.add_argument(
+        "--roi_full_scan_every",
+        type=int,
+        default=FULL_SCAN_EVERY,
+        help="Scan the whole frame on every Nth recognition pass in --roi mode."
+    )
+    parser.add_argument(
+        "--roi_watch",
+        nargs="+",
+        metavar="LEFT,TOP,RIGHT,BOTTOM",
+        default=[],
+        help="Regions searched on every pass in --roi mode, as fractions of the frame (e.g. a doorway: 0.8,0.2,1,0.9)."
+    )
+    parser.add_argument(
+        "--roi_far_band",
+        metavar="TOP,BOTTOM",
+        default=None,
+        help="Band of the frame holding the back rows (fractions of its height, e.g. 0.1,0.4), searched at a "
+             "higher resolution on full scans in --roi mode."
+    )
+    parser.add_argument(
+        "--display_size",
+        type=str,
+        default=None,
+        help="Resolution of the display window as WIDTHxHEIGHT (default: the capture resolution)."
+    )
+    parser.add_argument(
+        "--display_fps",
+        type=float,
+        default=None,
+        help="Highest frame rate at which the display window is updated (default: every captured frame)."
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Process without any display window, as fast as the video can be decoded."
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="PATH",
+        help="Audit recorded lectures headlessly: video files and/or directories of videos, one report per video."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of videos processed concurrently in --batch mode (default: one per CPU core)."
+    )
+    parser.add_argument(
+        "--rooms",
+        nargs="+",
+        metavar="NAME=SOURCE",
+        help="Monitor several cameras from one process (headless), e.g. --rooms lab=0 hall=rtsp://cam2/stream."
+    )
+    parser.add_argument(
+        "--recognition_threads",
+        type=int,
+        default=1,
+        help="Number of recognition passes that may run at once in --rooms mode, shared fairly between rooms."
+    )
+    parser.add_argument(
+        "--no_recognition_cache",
+        action="store_true",
+        help="Match every face against the roster instead of reusing recent decisions for nearby encodings."
+    )
+    parser.add_argument(
+        "--room",
+        type=str,
+        default=None,
+        help="Room the camera is in; with a timetable, matching is narrowed to the students scheduled there now."
+    )
+    parser.add_argument(
+        "--timetable",
+        type=str,
+        default=TIMETABLE_CSV,
+        help="Class timetable CSV (room,day,start,end,elective) used with --room and --rooms."
+    )
+    parser.add_argument(
+        "--electives",
+        nargs="+",
+        default=None,
+        help="Match the students of these electives first, regardless of the timetable."
+    )
+    parser.add_argument(
+        "--no_event_log",
+        action="store_true",
+        help="Do not stream presence and behavior events to a crash-safe .events.jsonl log during the session."
+    )
+    parser.add_argument(
+        "--summarize",
+        metavar="EVENT_LOG",
+        help="Build the attendance report from an existing .events.jsonl log (e.g. after a crash) and exit."
+    )
+    parser.add_argument(
+        "--attendance_db",
+        type=str,
+        default=ATTENDANCE_DB,
+        help="SQLite attendance store every finished session is added to; query it with attendance_store.py."
+    )
+    parser.add_argument(
+        "--no_attendance_db",
+        action="store_true",
+        help="Only write the CSV report, without adding the session to the attendance store."
+    )
+    parser.add_argument(
+        "--record_detections",
+        action="store_true",
+        help="Record every recognition pass's face boxes and encodings to a .detections file for --replay."
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DETECTION_LOG",
+        help="Re-run matching, tracking and the report from a recorded .detections file, without video, and exit."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=FACE_MATCH_TOLERANCE,
+        help="Maximum face distance that counts as a match; lower is stricter."
+    )
+    parser.add_argument(
+        "--startup_report",
+        action="store_true",
+        help="Print how long each startup phase (imports, roster loading, opening the video) took."
+    )
+    parser.add_argument(
+        "--behavior_model",
+        type=str,
+        default=None,
+        help="Behavior model for per-student inference: an .onnx model (needs onnxruntime) or an .npz "
+             "linear model. Without one the simulator is used."
+    )
+    parser.add_argument(
+        "--no_metrics",
+        action="store_true",
+        help="Disable all performance instrumentation (stage timers, frame and face counters)."
+    )
+    parser.add_argument(
+        "--metrics_port",
+        type=int,
+        default=None,
+        help="Serve live metrics in Prometheus text format at http://127.0.0.1:PORT/metrics."
+    )
+    parser.add_argument(
+        "--metrics_log_interval",
+        type=float,
+        default=LOG_INTERVAL,
+        help="Seconds between METRICS JSON log lines (0 disables the periodic log)."
+    )
     args = parser.parse_args()
+    attendance_db = None if args.no_attendance_db else args.attendance_db
+
+    if args.summarize:
+        # Stored under the session's own name, the rebuilt session replaces any copy already in the store
+        session_name = os.path.basename(args.summarize).split('.events')[0]
+        details = load_session_details(args.summarize)
+        generate_csv_report(load_event_log(args.summarize), report_time=details['end'],
+                            report_name=f"{session_name}_summary", attendance_db=attendance_db,
+                            electives=details['electives'], room=details['room'], session_name=session_name)
+        return
 
     # Convert video source to integer if it's a number (for webcam index)
     try:
@@ -21,9 +254,99 @@ def main():
     except ValueError:
         source = args.video_source
 
-    print(f"INFO: Using video source: {source}")
-    controller = StudyGuardController(video_source=source)
-    controller.run_monitoring()
+    clip_size = None
+    if args.clip_size:
+        try:
+            width, height = (int(side) for side in args.clip_size.lower().split('x'))
+            clip_size = (width, height)
+        except ValueError:
+            parser.error(f"--clip_size must look like 320x180, got '{args.clip_size}'")
+
+    display_size = None
+    if args.display_size:
+        try:
+            width, height = (int(side) for side in args.display_size.lower().split('x'))
+            display_size = (width, height)
+        except ValueError:
+            parser.error(f"--display_size must look like 1280x720, got '{args.display_size}'")
+
+    scheduler = None
+    if args.adaptive or args.cpu_budget or args.target_fps:
+        scheduler = AdaptiveScheduler(cpu_budget=args.cpu_budget, target_fps=args.target_fps)
+    face_detector = None
+    if args.roi:
+        try:
+            watch_regions = [tuple(float(value) for value in region.split(',')) for region in args.roi_watch]
+            far_band = tuple(float(value) for value in args.roi_far_band.split(',')) if args.roi_far_band else None
+        except ValueError:
+            parser.error("--roi_watch and --roi_far_band take comma-separated fractions, e.g. 0.8,0.2,1,0.9")
+        if any(len(region) != 4 for region in watch_regions) or (far_band and len(far_band) != 2):
+            parser.error("--roi_watch takes LEFT,TOP,RIGHT,BOTTOM and --roi_far_band takes TOP,BOTTOM")
+        for left, top, right, bottom in watch_regions:
+            if not (0 <= left < right <= 1 and 0 <= top < bottom <= 1):
+                parser.error(f"--roi_watch region {left},{top},{right},{bottom} must satisfy "
+                             "0 <= LEFT < RIGHT <= 1 and 0 <= TOP < BOTTOM <= 1")
+        if far_band and not 0 <= far_band[0] < far_band[1] <= 1:
+            parser.error("--roi_far_band must satisfy 0 <= TOP < BOTTOM <= 1")
+        face_detector = RegionOfInterestDetector(full_scan_every=args.roi_full_scan_every,
+                                                 watch_regions=watch_regions, far_band=far_band)
+    timetable = None
+    if (args.room or args.rooms) and os.path.exists(args.timetable):
+        timetable = load_timetable(args.timetable)
+    controller_options = {
+        'num_workers': args.workers,
+        'track_faces': not args.no_face_tracking,
+        'scheduler': scheduler,
+        'clip_length': args.clip_length,
+        'clip_stride': args.clip_stride,
+        'clip_size': clip_size,
+        'event_log': not args.no_event_log,
+        'instrument': not args.no_metrics,
+        'behavior_model': args.behavior_model,
+        'face_detector': face_detector,
+        'timetable': timetable,
+        'electives': args.electives,
+        'recognition_cache': not args.no_recognition_cache,
+        'match_tolerance': args.tolerance,
+        'detection_log': args.record_detections,
+        'attendance_db': attendance_db,
+    }
+
+    if args.replay:
+        report_name = os.path.basename(args.replay).split('.detections')[0]
+        # The recorded session is already in the attendance store; a replay only writes its CSV report
+        controller_options.update(detection_log=False, scheduler=None, face_detector=None, attendance_db=None)
+        controller = StudyGuardController(video_source=args.replay, headless=True, room=args.room,
+                                          report_name=f"{report_name}_replay", **controller_options)
+        controller.replay_detections(args.replay)
+        return
+
+    if args.batch:
+        if args.metrics_port and not args.no_metrics:
+            print("INFO: The metrics endpoint is not served in --batch mode; each video logs its metrics when it ends.")
+        process_videos(args.batch, jobs=args.jobs, room=args.room, **controller_options)
+        return
+
+    exporter = None
+    if not args.no_metrics:
+        exporter = MetricsExporter(port=args.metrics_port, log_interval=args.metrics_log_interval)
+    try:
+        if args.rooms:
+            server = MultiRoomServer(parse_room_sources(args.rooms), recognition_threads=args.recognition_threads,
+                                     **controller_options)
+            server.run()
+            return
+
+        print(f"INFO: Using video source: {source}")
+        controller = StudyGuardController(video_source=source, pipelined=args.pipelined,
+                                          max_in_flight=args.max_in_flight, headless=args.headless,
+                                          startup_report=args.startup_report, room=args.room,
+                                          display_size=display_size, display_fps=args.display_fps,
+                                          **controller_options)
+        controller.run_monitoring()
+    finally:
+        if exporter is not None:
+            exporter.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,256 @@
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Constants ---
+METRIC_PREFIX = 'studyguard'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # Seconds
+FACE_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)  # Faces detected in one recognition pass
+LOG_INTERVAL = 60.0  # Seconds between periodic METRICS log lines
+METRICS_HOST = '127.0.0.1'  # The endpoint is only served locally
+
+# Counter names and their help texts, in the order they are reported
+COUNTERS = {
+    'frames': 'Frames read from the video source.',
+    'frames_skipped': 'Frames the scheduler did not send to recognition.',
+    'frames_not_decoded': 'Frames grabbed but never decoded (headless mode).',
+    'frames_dropped': 'Frames discarded because a later stage or every worker was busy.',
+    'recognition_passes': 'Recognition passes run.',
+    'recognition_cache_hits': 'Faces decided from the recognition cache without a roster scan.',
+    'recognition_cache_misses': 'Faces that had to be matched against the roster.',
+}
+
+
+class _Histogram:
+    """Fixed-bucket histogram; the caller serializes access."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.maximum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.maximum:
+            self.maximum = value
+
+    def cumulative(self):
+        """Yields (upper bound, cumulative count) pairs, ending with +Inf."""
+        running = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            yield bound, running
+
+
+class _StageTimer:
+    __slots__ = ('_metrics', '_stage', '_started_at')
+
+    def __init__(self, metrics, stage):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe_stage(self._stage, time.perf_counter() - self._started_at)
+        return False
+
+
+class SessionMetrics:
+    """
+    Per-stage latency histograms and frame and face counters of one monitoring session.
+
+    Recording a sample costs a clock read, a bisect and a lock, so the timers can stay
+    on the hot path. Stages are created on first use, e.g. 'decode', 'detect', 'encode',
+    'match', 'behavior' and 'draw'.
+    """
+    enabled = True
+
+    def __init__(self, session):
+        self.session = session
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._faces = _Histogram(FACE_COUNT_BUCKETS)
+
+    def stage(self, name):
+        """Returns a context manager that times one run of a stage."""
+        return _StageTimer(self, name)
+
+    def observe_stage(self, name, seconds):
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = _Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def observe_faces(self, count):
+        """Records how many faces one recognition pass detected."""
+        with self._lock:
+            self._faces.observe(count)
+
+    def snapshot(self):
+        """Returns the current values as a JSON-serializable dict."""
+        with self._lock:
+            stages = {name: {'count': histogram.count,
+                             'mean_ms': round(1000 * histogram.total / histogram.count, 3),
+                             'max_ms': round(1000 * histogram.maximum, 3)}
+                      for name, histogram in self._stages.items()}
+            faces_per_pass = round(self._faces.total / self._faces.count, 2) if self._faces.count else 0.0
+            return {'session': self.session, 'counters': dict(self._counters), 'stages': stages,
+                    'faces_per_pass': faces_per_pass}
+
+    def _prometheus_samples(self):
+        """Returns this session's sample lines grouped by metric family."""
+        session = self.session.replace('\\', '\\\\').replace('"', '\\"')
+        samples = {}
+        with self._lock:
+            for name, value in self._counters.items():
+                samples[f"{name}_total"] = [f'{METRIC_PREFIX}_{name}_total{{session="{session}"}} {value}']
+            lines = samples['stage_seconds'] = []
+            for stage, histogram in sorted(self._stages.items()):
+                labels = f'session="{session}",stage="{stage}"'
+                lines.extend(_histogram_lines('stage_seconds', labels, histogram))
+            samples['faces_per_pass'] = _histogram_lines('faces_per_pass', f'session="{session}"', self._faces)
+        return samples
+
+
+class _NullMetrics:
+    """Stand-in used when instrumentation is disabled; every call is a no-op."""
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_TIMER
+
+    def observe_stage(self, name, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def observe_faces(self, count):
+        pass
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+NULL_METRICS = _NullMetrics()
+
+_sessions = []
+_sessions_lock = threading.Lock()
+
+
+def register_session(session):
+    """Creates the metrics of a monitoring session and includes them in every export."""
+    metrics = SessionMetrics(session)
+    with _sessions_lock:
+        _sessions.append(metrics)
+    return metrics
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = [f'{METRIC_PREFIX}_{name}_bucket{{{labels},le="{bound}"}} {count}'
+             for bound, count in histogram.cumulative()]
+    lines.append(f'{METRIC_PREFIX}_{name}_sum{{{labels}}} {histogram.total}')
+    lines.append(f'{METRIC_PREFIX}_{name}_count{{{labels}}} {histogram.count}')
+    return lines
+
+
+def render_prometheus():
+    """Renders the metrics of every session in the Prometheus text exposition format."""
+    with _sessions_lock:
+        sessions = list(_sessions)
+    families = [(f"{name}_total", 'counter', help_text) for name, help_text in COUNTERS.items()]
+    families.append(('stage_seconds', 'histogram', 'Latency of each processing stage in seconds.'))
+    families.append(('faces_per_pass', 'histogram', 'Faces detected per recognition pass.'))
+
+    all_samples = [session._prometheus_samples() for session in sessions]
+    lines = []
+    for family, metric_type, help_text in families:
+        lines.append(f"# HELP {METRIC_PREFIX}_{family} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{family} {metric_type}")
+        for samples in all_samples:
+            lines.extend(samples.get(family, []))
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsExporter:
+    """
+    Publishes the metrics of every session in this process.
+
+    Serves them at http://127.0.0.1:<port>/metrics for Prometheus if a port is given,
+    and prints them as one `METRICS: {...}` JSON line every `log_interval` seconds.
+    """
+    def __init__(self, port=None, log_interval=LOG_INTERVAL):
+        self._server = None
+        self._stop_event = threading.Event()
+        self._log_thread = None
+        if port:
+            try:
+                self._server = ThreadingHTTPServer((METRICS_HOST, port), _MetricsHandler)
+            except OSError as e:
+                print(f"ERROR: Could not serve metrics on port {port}: {e}")
+            else:
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+                print(f"INFO: Serving metrics at http://{METRICS_HOST}:{port}/metrics")
+        if log_interval:
+            self._log_thread = threading.Thread(target=self._log_loop, args=(log_interval,), name='metrics-log',
+                                                daemon=True)
+            self._log_thread.start()
+
+    def _log_loop(self, interval):
+        while not self._stop_event.wait(interval):
+            log_metrics()
+
+    def close(self):
+        """Stops the endpoint and the periodic log."""
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def log_metrics(sessions=None):
+    """Prints the metrics of the given sessions (default: all) as one JSON line."""
+    if sessions is None:
+        with _sessions_lock:
+            sessions = list(_sessions)
+    if sessions:
+        print(f"METRICS: {json.dumps([session.snapshot() for session in sessions])}")
@@ -0,0 +1,201 @@
+import collections
+import copy
+import threading
+from startup import lazy_import
+from face_manager import FaceManager
+from controller import StudyGuardController, BEHAVIOR_ANALYSIS_INTERVAL
+from metrics import log_metrics
+cv2 = lazy_import('cv2')
+
+# --- Constants ---
+JOIN_POLL_TIMEOUT = 0.5  # Seconds between checks for Ctrl+C while waiting on the room threads
+
+
+def parse_room_sources(sources):
+    """
+    Parses `name=source` entries (or bare sources) into (room name, video source) pairs.
+
+    Camera indices are converted to integers; unnamed sources become room1, room2, ...
+    """
+    rooms = []
+    for position, entry in enumerate(sources, start=1):
+        name, separator, source = entry.partition('=')
+        if not separator:
+            name, source = f"room{position}", entry
+        try:
+            source = int(source)
+        except ValueError:
+            pass
+        rooms.append((name, source))
+    return rooms
+
+
+class FairRecognitionQueue:
+    """
+    Shares recognition capacity fairly between rooms.
+
+    Each room holds at most one pending frame, its freshest, and rooms are served in
+    round-robin order. A busy room therefore only ever replaces its own stale frame
+    and cannot starve the others. A room is never handed to two recognition threads
+    at once, so its face tracks are only touched by one thread at a time.
+    """
+    def __init__(self, rooms):
+        self._condition = threading.Condition()
+        self._order = collections.deque(rooms)
+        self._pending = {}
+        self._busy = set()
+        self._closed = False
+
+    def offer(self, room, frame):
+        """Queues a room's frame for recognition, replacing any frame it still had waiting."""
+        with self._condition:
+            if room in self._pending:
+                room.dropped_frames += 1
+                room.controller.metrics.count('frames_dropped')
+            self._pending[room] = frame
+            self._condition.notify()
+
+    def take(self):
+        """Waits for the next room's frame in round-robin order. Returns None once closed and drained."""
+        with self._condition:
+            while True:
+                for _ in range(len(self._order)):
+                    room = self._order[0]
+                    self._order.rotate(-1)
+                    if room in self._pending and room not in self._busy:
+                        self._busy.add(room)
+                        return room, self._pending.pop(room)
+                if self._closed and not self._pending:
+                    return None
+                self._condition.wait()
+
+    def done(self, room):
+        """Marks a room's recognition pass as finished so its next frame can be taken."""
+        with self._condition:
+            self._busy.discard(room)
+            self._condition.notify_all()
+
+    def close(self):
+        """Lets recognition threads exit once the remaining frames are processed."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class Room:
+    """
+    One camera with its own controller, tracker and report.
+    """
+    def __init__(self, name, video_source, controller):
+        self.name = name
+        self.video_source = video_source
+        self.controller = controller
+        self.dropped_frames = 0
+        self.opened = False
+
+
+class MultiRoomServer:
+    """
+    Monitors several cameras from one process.
+
+    The roster is loaded and encoded once and its read-only encoding matrix is shared by
+    every room. Each room has its own capture thread, `StudentTracker` and report, while
+    a fixed number of recognition threads serve the rooms through a `FairRecognitionQueue`.
+    The server runs headless.
+    """
+    def __init__(self, room_sources, recognition_threads=1, **controller_options):
+        """
+        Args:
+            room_sources (list): (room name, video source) pairs.
+            recognition_threads (int): Number of recognition passes that may run at the same time.
+            **controller_options: Extra keyword arguments for each room's `StudyGuardController`.
+        """
+        if controller_options.pop('num_workers', 0):
+            print("INFO: Recognition worker processes are not used in multi-room mode; "
+                  "use --recognition_threads instead.")
+        face_manager = FaceManager()
+        self.rooms = []
+        for name, video_source in room_sources:
+            # Stateful options such as the scheduler must not be shared between rooms.
+            options = copy.deepcopy(controller_options)
+            controller = StudyGuardController(video_source, face_manager=face_manager, pipelined=True,
+                                              headless=True, report_name=f"attendance_report_{name}", room=name,
+                                              **options)
+            self.rooms.append(Room(name, video_source, controller))
+        self.recognition_threads = recognition_threads
+        self._queue = FairRecognitionQueue(self.rooms)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Monitors all rooms until every stream ends or Ctrl+C is pressed, then writes one report per room."""
+        capture_threads = [threading.Thread(target=self._room_loop, args=(room,), name=f"capture-{room.name}",
+                                            daemon=True) for room in self.rooms]
+        recognition_threads = [threading.Thread(target=self._recognition_loop, name=f"recognition-{index}",
+                                                daemon=True) for index in range(self.recognition_threads)]
+        for thread in capture_threads + recognition_threads:
+            thread.start()
+        print(f"INFO: Monitoring {len(self.rooms)} rooms with {self.recognition_threads} recognition threads. "
+              "Press Ctrl+C to stop.")
+
+        try:
+            for thread in capture_threads:
+                while thread.is_alive():
+                    thread.join(JOIN_POLL_TIMEOUT)
+        except KeyboardInterrupt:
+            print("INFO: Ctrl+C pressed. Shutting down...")
+            self._stop_event.set()
+            for thread in capture_threads:
+                thread.join()
+        self._queue.close()
+        for thread in recognition_threads:
+            thread.join()
+
+        log_metrics([room.controller.metrics for room in self.rooms if room.controller.metrics.enabled])
+        for room in self.rooms:
+            if room.dropped_frames:
+                print(f"INFO: Room {room.name} skipped {room.dropped_frames} frames while recognition was busy.")
+            if room.opened:
+                room.controller._write_report()
+
+    def _room_loop(self, room):
+        controller = room.controller
+        video_capture = cv2.VideoCapture(room.video_source)
+        if not video_capture.isOpened():
+            print(f"ERROR: Cannot open video source for room {room.name}: {room.video_source}")
+            return
+        room.opened = True
+        controller._open_session_logs()
+
+        frame_count = 0
+        while not self._stop_event.is_set():
+            with controller.metrics.stage('decode'):
+                ret, frame = video_capture.read()
+            if not ret:
+                print(f"INFO: End of video stream for room {room.name}.")
+                break
+            controller.metrics.count('frames')
+
+            rgb_small_frame = controller._prepare_frame(frame)
+            controller.frame_buffer.append(rgb_small_frame)
+            if controller.scheduler.should_process(rgb_small_frame):
+                self._queue.offer(room, rgb_small_frame)
+            else:
+                controller.metrics.count('frames_skipped')
+
+            if frame_count % BEHAVIOR_ANALYSIS_INTERVAL == 0 and len(controller.frame_buffer):
+                controller._analyze_behavior_in_frame()
+            frame_count += 1
+        video_capture.release()
+
+    def _recognition_loop(self):
+        while True:
+            task = self._queue.take()
+            if task is None:
+                return
+            room, rgb_small_frame = task
+            try:
+                room.controller._recognize(rgb_small_frame)
+            except Exception as e:
+                print(f"ERROR: Recognition failed for room {room.name}: {e}")
+            finally:
+                self._queue.done(room)
@@ -0,0 +1,58 @@
+from startup import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# --- Constants ---
+FONT_SCALE = 0.6
+FONT_THICKNESS = 2
+TEXT_COLOR = (0, 255, 0)
+FIRST_LINE_Y = 30  # Baseline of the first line, in pixels from the top of the frame
+LINE_HEIGHT = 20
+LEFT_MARGIN = 10
+
+
+class PresenceOverlay:
+    """
+    Pre-rendered text layer listing the present students.
+
+    The text is rendered into a small layer only when the set of present students
+    changes. Drawing it on a frame alpha-blends that layer in two vectorized passes, so
+    no font rendering happens per frame and anti-aliased text keeps its smooth edges.
+    """
+    def __init__(self):
+        self._layer = None
+        self._inverse_alpha = None
+
+    def update(self, present_students):
+        """
+        Re-renders the layer.
+
+        Args:
+            present_students (list): (roll_no, metadata) pairs, as returned by `StudentTracker.present_students`.
+        """
+        lines = [f"{metadata['name']} ({roll_no}) - Present" for roll_no, metadata in present_students]
+        if not lines:
+            self._layer = self._inverse_alpha = None
+            return
+        sizes = [cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, FONT_SCALE, FONT_THICKNESS) for line in lines]
+        width = LEFT_MARGIN + max(text_width for (text_width, _), _ in sizes) + FONT_THICKNESS
+        height = FIRST_LINE_Y + LINE_HEIGHT * (len(lines) - 1) + max(baseline for _, baseline in sizes) + FONT_THICKNESS
+
+        layer = np.zeros((height, width, 3), dtype=np.uint8)
+        for position, line in enumerate(lines):
+            cv2.putText(layer, line, (LEFT_MARGIN, FIRST_LINE_Y + LINE_HEIGHT * position), cv2.FONT_HERSHEY_SIMPLEX,
+                        FONT_SCALE, TEXT_COLOR, FONT_THICKNESS)
+        # Rendered on black, the layer already holds the text colour premultiplied by its coverage.
+        self._layer = layer
+        self._inverse_alpha = cv2.merge([255 - layer.max(axis=2)] * 3)
+
+    def draw(self, frame):
+        """Blends the text onto a BGR frame in place and returns the frame."""
+        if self._layer is None:
+            return frame
+        height = min(self._layer.shape[0], frame.shape[0])
+        width = min(self._layer.shape[1], frame.shape[1])
+        region = frame[:height, :width]
+        cv2.multiply(region, self._inverse_alpha[:height, :width], dst=region, scale=1 / 255)
+        cv2.add(region, self._layer[:height, :width], dst=region)
+        return frame
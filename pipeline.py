@@ -0,0 +1,141 @@
+import queue
+import threading
+from startup import lazy_import
+cv2 = lazy_import('cv2')
+
+# --- Constants ---
+WINDOW_NAME = 'StudyGuard - AI Classroom Monitoring'
+QUEUE_POLL_TIMEOUT = 0.1  # Seconds a stage waits on its input before re-checking for shutdown
+
+_END_OF_STREAM = object()
+
+
+class FramePipeline:
+    """
+    Runs capture, recognition, behavior analysis and display as separate stages
+    connected by bounded queues.
+
+    Capture and the worker stages run on background threads, while display stays on the
+    calling thread because OpenCV's GUI functions must be called from the main thread.
+    With `drop_stale_frames` enabled (live cameras), a full queue discards its oldest
+    frame so capture never blocks and recognition always works on the freshest frame.
+    Without it (video files), capture waits for downstream stages so no frame is lost.
+    """
+    def __init__(self, controller, video_capture, behavior_interval, max_in_flight=4, drop_stale_frames=True):
+        self.controller = controller
+        self.video_capture = video_capture
+        self.behavior_interval = behavior_interval
+        self.drop_stale_frames = drop_stale_frames
+
+        # Recognition only ever needs the newest frame, the other stages keep up to `max_in_flight`.
+        self._recognition_queue = queue.Queue(maxsize=1)
+        self._behavior_queue = queue.Queue(maxsize=max_in_flight)
+        self._display_queue = queue.Queue(maxsize=max_in_flight)
+        self._stop_event = threading.Event()
+        self.dropped_frames = 0
+
+    def run(self):
+        """Starts the worker stages and runs the display stage until the stream ends or 'q' is pressed."""
+        workers = [
+            threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self._recognition_loop, name='recognition', daemon=True),
+            threading.Thread(target=self._behavior_loop, name='behavior', daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            self._display_loop()
+        finally:
+            self._stop_event.set()
+            for worker in workers:
+                worker.join()
+        if self.dropped_frames:
+            print(f"INFO: Dropped {self.dropped_frames} stale frames to keep up with the video source.")
+
+    def _offer(self, stage_queue, item):
+        """Hands an item to a stage, dropping that stage's oldest item instead of blocking if allowed."""
+        if not self.drop_stale_frames:
+            while not self._stop_event.is_set():
+                try:
+                    stage_queue.put(item, timeout=QUEUE_POLL_TIMEOUT)
+                    return
+                except queue.Full:
+                    continue
+            return
+
+        while True:
+            try:
+                stage_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    stage_queue.get_nowait()
+                    self.dropped_frames += 1
+                    self.controller.metrics.count('frames_dropped')
+                except queue.Empty:
+                    pass
+
+    def _take(self, stage_queue):
+        """Waits for the next item of a stage, returning `_END_OF_STREAM` once the pipeline stops."""
+        while True:
+            try:
+                return stage_queue.get(timeout=QUEUE_POLL_TIMEOUT)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return _END_OF_STREAM
+
+    def _capture_loop(self):
+        metrics = self.controller.metrics
+        frame_count = 0
+        while not self._stop_event.is_set():
+            with metrics.stage('decode'):
+                ret, frame = self.video_capture.read()
+            if not ret:
+                print("INFO: End of video stream.")
+                break
+            metrics.count('frames')
+
+            rgb_small_frame = self.controller._prepare_frame(frame)
+            if self.controller.scheduler.should_process(rgb_small_frame):
+                self._offer(self._recognition_queue, rgb_small_frame)
+            else:
+                metrics.count('frames_skipped')
+            self._offer(self._behavior_queue, (frame_count, rgb_small_frame))
+            self._offer(self._display_queue, frame)
+            frame_count += 1
+
+        for stage_queue in (self._recognition_queue, self._behavior_queue, self._display_queue):
+            self._offer(stage_queue, _END_OF_STREAM)
+
+    def _recognition_loop(self):
+        while True:
+            rgb_small_frame = self._take(self._recognition_queue)
+            if rgb_small_frame is _END_OF_STREAM:
+                return
+            self.controller._recognize(rgb_small_frame)
+
+    def _behavior_loop(self):
+        next_analysis_at = 0
+        while True:
+            item = self._take(self._behavior_queue)
+            if item is _END_OF_STREAM:
+                return
+            frame_count, rgb_small_frame = item
+            self.controller.frame_buffer.append(rgb_small_frame)
+            if frame_count >= next_analysis_at:
+                self.controller._analyze_behavior_in_frame()
+                next_analysis_at = frame_count + self.behavior_interval
+
+    def _display_loop(self):
+        while True:
+            frame = self._take(self._display_queue)
+            if frame is _END_OF_STREAM:
+                return
+            with self.controller.metrics.stage('display'):
+                if self.controller._should_display():
+                    cv2.imshow(WINDOW_NAME, self.controller._visualize_data(frame))
+                key = cv2.waitKey(1)
+
+            if key & 0xFF == ord('q'):
+                print("INFO: 'q' pressed. Shutting down...")
+                return
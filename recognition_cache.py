@@ -0,0 +1,163 @@
+import time
+from collections import OrderedDict
+from startup import lazy_import
+from metrics import NULL_METRICS
+np = lazy_import('numpy')
+
+# --- Constants ---
+CACHE_CAPACITY = 256  # Encodings remembered at most; the least recently used one is evicted first
+CACHE_TTL = 30.0  # Seconds a recognition decision may be reused before the roster is asked again
+CACHE_RADIUS = 0.25  # Face distance within which a new encoding reuses a cached decision
+
+
+class RecognitionCache:
+    """
+    Bounded cache of recently seen face encodings and the recognition decision made for
+    each, including "unknown".
+
+    A new encoding within `radius` of a cached one reuses its decision without a roster
+    scan. A cached match is only reused if the new encoding is provably within the match
+    tolerance of the student: its distance to the cached encoding plus the cached
+    encoding's distance to the student must not exceed the tolerance. Entries expire
+    `ttl` seconds after they were stored, so decisions are refreshed regularly, and the
+    least recently used entry is evicted when the cache is full.
+    """
+    def __init__(self, capacity=CACHE_CAPACITY, ttl=CACHE_TTL, radius=CACHE_RADIUS, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.radius = radius
+        self._clock = clock
+        self._encodings = np.zeros((capacity, 128), dtype=np.float32)
+        self._sq_norms = np.zeros(capacity, dtype=np.float32)
+        self._expires_at = np.zeros(capacity)
+        self._match_distances = np.zeros(capacity)  # Distance of each cached match to its student
+        self._outcomes = [None] * capacity
+        self._lru = OrderedDict()  # Occupied slots, least recently used first
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._lru)
+
+    def lookup(self, face_encodings, tolerance=float('inf')):
+        """
+        Looks up the decisions for a frame's encodings.
+
+        Args:
+            face_encodings (list): The encodings of the faces to identify.
+            tolerance (float): Match tolerance a reused match must still satisfy.
+
+        Returns:
+            list: The cached (bool, metadata) decision for each encoding, or None on a miss.
+        """
+        outcomes = [None] * len(face_encodings)
+        self._evict_expired()
+        if len(face_encodings) and self._lru:
+            slots = np.fromiter(self._lru, dtype=np.intp, count=len(self._lru))
+            queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, 128)
+            sq_distances = (np.einsum('ij,ij->i', queries, queries)[:, None] + self._sq_norms[slots][None, :]
+                            - 2.0 * (queries @ self._encodings[slots].T))
+            nearest = sq_distances.argmin(axis=1)
+            for index, (position, sq_distance) in enumerate(zip(nearest.tolist(),
+                                                                sq_distances[np.arange(len(queries)), nearest].tolist())):
+                if sq_distance > self.radius * self.radius:
+                    continue
+                slot = int(slots[position])
+                match_found, _ = self._outcomes[slot]
+                if match_found and self._match_distances[slot] + max(sq_distance, 0.0) ** 0.5 > tolerance:
+                    continue
+                self._lru.move_to_end(slot)
+                outcomes[index] = self._outcomes[slot]
+        hits = sum(outcome is not None for outcome in outcomes)
+        self.hits += hits
+        self.misses += len(outcomes) - hits
+        return outcomes
+
+    def store(self, face_encoding, outcome, match_distance=0.0):
+        """Remembers the decision made for an encoding and, for a match, its distance to the student."""
+        if not self.capacity:
+            return
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot, _ = self._lru.popitem(last=False)
+        encoding = np.asarray(face_encoding, dtype=np.float32)
+        self._encodings[slot] = encoding
+        self._sq_norms[slot] = encoding @ encoding
+        self._expires_at[slot] = self._clock() + self.ttl
+        self._outcomes[slot] = outcome
+        self._match_distances[slot] = match_distance
+        self._lru[slot] = None
+
+    def clear(self):
+        """Forgets every decision, e.g. because the roster they were made against has changed."""
+        self._lru.clear()
+        self._outcomes = [None] * self.capacity
+        self._free_slots = list(range(self.capacity - 1, -1, -1))
+
+    def _evict_expired(self):
+        now = self._clock()
+        for slot in [slot for slot in self._lru if self._expires_at[slot] <= now]:
+            del self._lru[slot]
+            self._outcomes[slot] = None
+            self._free_slots.append(slot)
+
+
+class CachedRoster:
+    """
+    Puts a `RecognitionCache` in front of a roster (a `FaceManager` or `SessionRoster`).
+
+    Cache hits are still assigned one-to-one: a cached match for a student already
+    claimed in the frame is treated as a miss and decided by the roster. A decision is
+    only cached if the roster would make it for the face alone, so a face left unknown
+    because its student was claimed is matched again once the claim is gone.
+    """
+    def __init__(self, roster, cache=None, metrics=NULL_METRICS):
+        self.roster = roster
+        self.cache = cache if cache is not None else RecognitionCache()
+        self.metrics = metrics
+
+    def find_match(self, face_encoding, tolerance=0.6):
+        """Matches one face encoding; see `FaceManager.find_match`."""
+        return self.find_matches([face_encoding], tolerance)[0]
+
+    def find_matches(self, face_encodings, tolerance=0.6, exclude_roll_nos=()):
+        """Matches the faces of a frame, as `FaceManager.find_matches` does."""
+        results = [None] * len(face_encodings)
+        claimed_roll_nos = set(exclude_roll_nos)
+        for index, outcome in enumerate(self.cache.lookup(face_encodings, tolerance)):
+            if outcome is None:
+                continue
+            match_found, metadata = outcome
+            if match_found:
+                if metadata['roll_no'] in claimed_roll_nos:
+                    continue
+                claimed_roll_nos.add(metadata['roll_no'])
+            results[index] = outcome
+
+        misses = [index for index, outcome in enumerate(results) if outcome is None]
+        self.metrics.count('recognition_cache_hits', len(results) - len(misses))
+        self.metrics.count('recognition_cache_misses', len(misses))
+        if misses:
+            # Claims by other faces may have changed the roster's decisions; those are not reusable later
+            constrained = bool(claimed_roll_nos) or len(misses) > 1
+            decided = self.roster.find_matches([face_encodings[index] for index in misses], tolerance,
+                                               exclude_roll_nos=claimed_roll_nos)
+            for index, outcome in zip(misses, decided):
+                results[index] = outcome
+                match_found, metadata = outcome
+                alone = self.roster.find_match(face_encodings[index], tolerance) if constrained else outcome
+                if not self._same_decision(outcome, alone):
+                    continue
+                match_distance = (self.roster.distance_to(face_encodings[index], metadata['roll_no'])
+                                  if match_found else 0.0)
+                self.cache.store(face_encodings[index], outcome, match_distance)
+        return results
+
+    @staticmethod
+    def _same_decision(outcome, other):
+        """Whether two (bool, metadata) decisions identify the same student, or both none."""
+        if outcome[0] != other[0]:
+            return False
+        return not outcome[0] or outcome[1]['roll_no'] == other[1]['roll_no']
@@ -0,0 +1,232 @@
+import multiprocessing as mp
+import queue
+from multiprocessing import shared_memory
+from startup import lazy_import
+from utils import box_iou
+np = lazy_import('numpy')
+face_recognition = lazy_import('face_recognition')
+
+# --- Constants ---
+SLOTS_PER_WORKER = 2  # Shared-memory frame slots per worker, so the next frame can be staged while one is processed
+LARGE_FRAME_SIDE = 960  # Frames whose longer side exceeds this are split into a 2x2 grid of tiles
+TILE_OVERLAP = 80  # Pixels shared by neighbouring tiles so faces on a tile border are still found whole
+DUPLICATE_IOU_THRESHOLD = 0.3  # Faces from neighbouring tiles overlapping more than this are the same face
+RESULT_POLL_TIMEOUT = 1.0  # Seconds between checks that the workers are still alive while waiting for results
+
+
+def _worker_main(task_queue, result_queue):
+    """
+    Detects and encodes faces in frame tiles read straight from shared memory.
+
+    Each task names the shared-memory slot holding the frame and the tile to process,
+    so no pixel data ever passes through the queues.
+    """
+    attached = {}
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        seq, tile_index, slot_name, shape, (top, bottom, left, right) = task
+        if slot_name not in attached:
+            attached[slot_name] = shared_memory.SharedMemory(name=slot_name)
+
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=attached[slot_name].buf)
+        tile = np.ascontiguousarray(frame[top:bottom, left:right])
+        try:
+            locations = face_recognition.face_locations(tile)
+            encodings = face_recognition.face_encodings(tile, locations)
+        except Exception as e:
+            print(f"ERROR: Recognition worker failed on frame {seq}: {e}")
+            locations, encodings = [], []
+        # Release the views before the slot can be reused or closed.
+        del frame, tile
+
+        locations = [(t + top, r + left, b + top, l + left) for t, r, b, l in locations]
+        result_queue.put((seq, tile_index, locations, encodings))
+
+    for slot in attached.values():
+        slot.close()
+
+
+def _tile_regions(shape):
+    """Splits large frames into an overlapping 2x2 grid of (top, bottom, left, right) regions."""
+    height, width = shape[:2]
+    if max(height, width) <= LARGE_FRAME_SIDE:
+        return [(0, height, 0, width)]
+    mid_y, mid_x = height // 2, width // 2
+    rows = [(0, min(height, mid_y + TILE_OVERLAP)), (max(0, mid_y - TILE_OVERLAP), height)]
+    cols = [(0, min(width, mid_x + TILE_OVERLAP)), (max(0, mid_x - TILE_OVERLAP), width)]
+    return [(top, bottom, left, right) for top, bottom in rows for left, right in cols]
+
+
+def _merge_tile_faces(locations, encodings):
+    """Drops duplicate detections of faces that fall into the overlap of neighbouring tiles."""
+    kept_locations, kept_encodings = [], []
+    for location, encoding in zip(locations, encodings):
+        if all(box_iou(location, kept) <= DUPLICATE_IOU_THRESHOLD for kept in kept_locations):
+            kept_locations.append(location)
+            kept_encodings.append(encoding)
+    return kept_locations, kept_encodings
+
+
+class RecognitionWorkerPool:
+    """
+    Fans face detection and encoding out to a pool of worker processes.
+
+    Frames are copied once into preallocated `multiprocessing.shared_memory` slots
+    instead of being pickled, large frames are split into tiles, and results are
+    handed back strictly in the order the frames were submitted.
+    """
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self._context = mp.get_context('spawn')
+        self._start_workers()
+        print(f"INFO: Started {num_workers} recognition worker processes.")
+        self.failed_frames = 0  # Frames given up on because a worker died while they were pending
+
+        self._slots = []
+        self._free_slots = []
+        self._frame_shape = None
+        self._next_seq = 0
+        self._next_seq_out = 0
+        self._pending = {}
+        self._completed = {}
+
+    def submit(self, frame, block=False):
+        """
+        Stages an RGB frame in shared memory and queues it for the workers.
+
+        Args:
+            frame (ndarray): The RGB frame to detect and encode faces in.
+            block (bool): Wait for a free slot instead of skipping the frame when all slots are busy.
+
+        Returns:
+            bool: True if the frame was queued, False if it was skipped.
+        """
+        if frame.shape != self._frame_shape:
+            self._allocate_slots(frame.shape)
+        while not self._free_slots:
+            if not block:
+                return False
+            self._receive(block=True)
+
+        slot = self._free_slots.pop()
+        np.copyto(np.ndarray(frame.shape, dtype=np.uint8, buffer=slot.buf), frame)
+        seq = self._next_seq
+        self._next_seq += 1
+
+        regions = _tile_regions(frame.shape)
+        self._pending[seq] = {'slot': slot, 'tiles_left': len(regions), 'locations': [], 'encodings': []}
+        for tile_index, region in enumerate(regions):
+            self._task_queue.put((seq, tile_index, slot.name, frame.shape, region))
+        return True
+
+    def collect(self, block=False):
+        """
+        Returns the results that are ready, in submission order.
+
+        Args:
+            block (bool): Wait until every submitted frame has been processed.
+
+        Returns:
+            list: (face_locations, face_encodings) tuples, one per finished frame.
+        """
+        while True:
+            self._receive(block=block and bool(self._pending))
+            if not block or not self._pending:
+                break
+
+        results = []
+        while self._next_seq_out in self._completed:
+            result = self._completed.pop(self._next_seq_out)
+            if result is not None:
+                results.append(result)
+            self._next_seq_out += 1
+        return results
+
+    def close(self):
+        """Stops the workers and releases the shared-memory slots."""
+        for _ in self._workers:
+            self._task_queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._release_slots()
+
+    def _start_workers(self):
+        self._task_queue = self._context.Queue()
+        self._result_queue = self._context.Queue()
+        self._workers = [self._context.Process(target=_worker_main, args=(self._task_queue, self._result_queue),
+                                               daemon=True) for _ in range(self.num_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _receive(self, block):
+        """
+        Moves finished tiles from the result queue into their frames. While blocking, the
+        workers are checked regularly, so a crashed worker cannot hang the caller.
+        """
+        while True:
+            try:
+                seq, _, locations, encodings = self._result_queue.get(
+                    block=block, timeout=RESULT_POLL_TIMEOUT if block else None)
+            except queue.Empty:
+                if block and not self._replace_dead_workers():
+                    continue
+                return
+            block = False
+
+            job = self._pending[seq]
+            job['locations'].extend(locations)
+            job['encodings'].extend(encodings)
+            job['tiles_left'] -= 1
+            if job['tiles_left'] == 0:
+                del self._pending[seq]
+                self._free_slots.append(job['slot'])
+                self._completed[seq] = _merge_tile_faces(job['locations'], job['encodings'])
+
+    def _replace_dead_workers(self):
+        """
+        Restarts the workers if any of them died, e.g. from a crash in dlib or the OOM killer.
+
+        A worker killed inside a queue operation can leave the queue's lock held, so all
+        workers are restarted with new queues. Tasks in flight are lost, so every pending
+        frame is given up on and yields no result.
+
+        Returns:
+            bool: True if a worker had died.
+        """
+        dead = sum(not worker.is_alive() for worker in self._workers)
+        if not dead:
+            return False
+        print(f"ERROR: {dead} recognition worker(s) died; dropping {len(self._pending)} pending frames "
+              "and restarting the workers.")
+        for seq, job in self._pending.items():
+            self._free_slots.append(job['slot'])
+            self._completed[seq] = None
+        self.failed_frames += len(self._pending)
+        self._pending.clear()
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self._start_workers()
+        return True
+
+    def _allocate_slots(self, shape):
+        """(Re)creates the shared-memory slots for frames of the given shape."""
+        while self._pending:
+            self._receive(block=True)
+        self._release_slots()
+        nbytes = int(np.prod(shape))
+        self._slots = [shared_memory.SharedMemory(create=True, size=nbytes)
+                       for _ in range(self.num_workers * SLOTS_PER_WORKER)]
+        self._free_slots = list(self._slots)
+        self._frame_shape = shape
+
+    def _release_slots(self):
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots = []
+        self._free_slots = []
+        self._frame_shape = None
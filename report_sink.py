@@ -0,0 +1,146 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+# --- Constants ---
+FLUSH_EVERY_EVENTS = 200  # Buffered events that trigger a write
+FLUSH_INTERVAL = 5.0  # Seconds after which buffered events are written even if few arrived
+
+
+class ReportSink:
+    """
+    Append-only JSON Lines log of presence and behavior events.
+
+    Events are buffered and written in batches, each batch followed by an fsync, so a
+    crash or power cut loses at most the last few seconds of a session. Every line is
+    a self-contained JSON object with at least an `event` and a `time` field.
+    """
+    def __init__(self, path, flush_every=FLUSH_EVERY_EVENTS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8')
+        print(f"INFO: Logging session events to {path}")
+
+    def emit(self, event, timestamp, **fields):
+        """
+        Buffers one event.
+
+        Args:
+            event (str): Event type, e.g. 'enter', 'exit' or 'behavior'.
+            timestamp (datetime): When the event happened.
+            **fields: Event-specific JSON-serializable fields.
+        """
+        record = {'event': event, 'time': timestamp.isoformat(timespec='milliseconds')}
+        record.update(fields)
+        self._buffer.append(json.dumps(record))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush_if_due(self):
+        """Writes buffered events if the flush interval has passed."""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes all buffered events and forces them to disk."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        try:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer.clear()
+        except OSError as e:
+            print(f"ERROR: Could not write session events to {self.path}: {e}")
+
+    def close(self):
+        """Flushes remaining events and closes the log."""
+        self.flush()
+        self._file.close()
+
+
+def load_session_details(path):
+    """
+    Reads what an event log records about the session itself.
+
+    Returns:
+        dict: 'end' (time of the last presence or behavior event, or None), 'electives' (set from
+              the last session event, or None if it was empty or never logged) and 'room'.
+    """
+    details = {'end': None, 'electives': None, 'room': None}
+    session_logged_at = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                timestamp = datetime.fromisoformat(record['time'])
+            except (ValueError, KeyError):
+                continue
+            if record.get('event') == 'session':
+                # Logged when the roster is selected, which may be before a recording's clock is set
+                session_logged_at = timestamp
+                details['electives'] = set(record.get('electives') or ()) or None
+                details['room'] = record.get('room')
+            else:
+                details['end'] = timestamp
+    details['end'] = details['end'] or session_logged_at
+    return details
+
+
+def load_event_log(path):
+    """
+    Rebuilds per-student session data from an event log in one streaming pass.
+
+    Intervals left open by a crash are closed at the student's last logged event.
+    Truncated trailing lines are skipped.
+
+    Returns:
+        dict: Student data keyed by roll number, in the format of
+              `StudentTracker.get_all_students_data`.
+    """
+    students = {}
+    open_since = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                timestamp = datetime.fromisoformat(record['time'])
+            except (ValueError, KeyError):
+                print(f"WARNING: Skipping unreadable line {line_number} of {path}.")
+                continue
+
+            roll_no = record.get('roll_no')
+            event = record.get('event')
+            if event == 'enter' and roll_no not in students:
+                students[roll_no] = {
+                    'metadata': {'roll_no': roll_no, 'name': record.get('name'), 'elective': record.get('elective')},
+                    'entry_time': timestamp,
+                    'last_seen': timestamp,
+                    'present': False,
+                    'time_present': timedelta(0),
+                    'behaviors': set()
+                }
+            student = students.get(roll_no)
+            if student is None:
+                continue
+
+            if event == 'enter':
+                open_since[roll_no] = timestamp
+            elif event == 'exit':
+                student['time_present'] += timedelta(seconds=record.get('seconds', 0.0))
+                open_since.pop(roll_no, None)
+            elif event == 'behavior':
+                student['behaviors'].add(record.get('action'))
+            student['last_seen'] = max(student['last_seen'], timestamp)
+
+    for roll_no, started in open_since.items():
+        students[roll_no]['time_present'] += students[roll_no]['last_seen'] - started
+    return students
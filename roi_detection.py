@@ -0,0 +1,158 @@
+from startup import lazy_import
+from utils import box_iou
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+face_recognition = lazy_import('face_recognition')
+
+# --- Constants ---
+FULL_SCAN_EVERY = 10  # Every Nth recognition pass scans the whole frame to catch newcomers
+WINDOW_PADDING = 1.0  # Search windows reach this many face sizes beyond a last-known face on each side
+KNOWN_FACE_PASSES = 3  # Passes a position is still searched after the face was last detected there
+SMALL_FACE_SIDE = 48  # Faces smaller than this many pixels are searched at a higher resolution
+MAX_WINDOW_AREA = 0.6  # If the search windows cover more of the frame than this, a full scan is cheaper
+MOTION_FRAME_SIZE = (80, 60)  # Thumbnail size used to find moving regions
+MOTION_THRESHOLD = 25  # Grey-level change for a thumbnail pixel to count as moving
+MAX_MOTION_AREA = 0.4  # If more of the frame moves than this, the pass becomes a full scan
+DUPLICATE_IOU_THRESHOLD = 0.3  # Detections from overlapping windows that overlap more than this are one face
+
+
+class RegionOfInterestDetector:
+    """
+    Detects faces only where they are likely to be, with a periodic full-frame scan.
+
+    Seated students stay put, so most passes only search padded windows around the
+    faces found in recent passes, around regions that moved since the previous pass and
+    around fixed watch regions such as the doorway. Every `full_scan_every` passes, and
+    whenever a lot of the frame moves, the whole frame is scanned instead.
+
+    Detection is multi-scale: windows around small (distant) faces are upsampled before
+    detection, and an optional `far_band` of the frame holding the back rows is searched
+    at a higher resolution during full scans, without upscaling the whole frame.
+    """
+    def __init__(self, full_scan_every=FULL_SCAN_EVERY, padding=WINDOW_PADDING, watch_regions=(),
+                 far_band=None, far_upsample=2):
+        """
+        Args:
+            full_scan_every (int): Scan the whole frame on every Nth pass.
+            padding (float): Window padding around a last-known face, in face sizes.
+            watch_regions (list): (left, top, right, bottom) regions, as fractions of the frame, searched on every pass.
+            far_band (tuple): (top, bottom) fractions of the frame height holding the back rows.
+            far_upsample (int): Times the far band is upsampled during full scans.
+        """
+        self.full_scan_every = max(1, full_scan_every)
+        self.padding = padding
+        self.watch_regions = list(watch_regions)
+        self.far_band = far_band
+        self.far_upsample = far_upsample
+        self.full_scans = 0
+        self.window_scans = 0
+        self._passes = 0
+        self._known = []  # [face box, passes left]
+        self._previous_thumbnail = None
+
+    def detect(self, frame):
+        """
+        Finds the faces in an RGB frame.
+
+        Returns:
+            list: Face boxes in face_recognition's (top, right, bottom, left) order.
+        """
+        height, width = frame.shape[:2]
+        motion_windows, motion_area = self._motion_windows(frame)
+        windows = None
+        if self._passes % self.full_scan_every and motion_area <= MAX_MOTION_AREA:
+            windows = self._merge_windows(self._known_windows(height, width) + motion_windows
+                                          + self._watch_windows(height, width))
+            if sum((b - t) * (r - l) for t, b, l, r, _ in windows) > MAX_WINDOW_AREA * height * width:
+                windows = None
+        self._passes += 1
+
+        if windows is None:
+            self.full_scans += 1
+            locations = face_recognition.face_locations(frame)
+            if self.far_band is not None:
+                top, bottom = int(self.far_band[0] * height), int(self.far_band[1] * height)
+                locations += self._detect_in(frame, (top, bottom, 0, width, self.far_upsample))
+        else:
+            self.window_scans += 1
+            locations = []
+            for window in windows:
+                locations += self._detect_in(frame, window)
+
+        locations = self._drop_duplicates(locations)
+        self._remember(locations)
+        return locations
+
+    def _detect_in(self, frame, window):
+        top, bottom, left, right, upsample = window
+        crop = np.ascontiguousarray(frame[top:bottom, left:right])
+        found = face_recognition.face_locations(crop, number_of_times_to_upsample=upsample)
+        return [(t + top, r + left, b + top, l + left) for t, r, b, l in found]
+
+    def _known_windows(self, height, width):
+        """Padded windows around recently detected faces, upsampled for small faces."""
+        windows = []
+        for (top, right, bottom, left), _ in self._known:
+            side = max(bottom - top, right - left)
+            pad = int(self.padding * side)
+            upsample = 2 if side < SMALL_FACE_SIDE else 1
+            windows.append((max(0, top - pad), min(height, bottom + pad),
+                            max(0, left - pad), min(width, right + pad), upsample))
+        return windows
+
+    def _watch_windows(self, height, width):
+        return [(int(top * height), int(bottom * height), int(left * width), int(right * width), 1)
+                for left, top, right, bottom in self.watch_regions]
+
+    def _motion_windows(self, frame):
+        """Returns windows around regions that changed since the previous pass and the moving fraction of the frame."""
+        thumbnail = cv2.cvtColor(cv2.resize(frame, MOTION_FRAME_SIZE, interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_RGB2GRAY)
+        previous, self._previous_thumbnail = self._previous_thumbnail, thumbnail
+        if previous is None:
+            return [], 1.0
+
+        moving = (cv2.absdiff(thumbnail, previous) > MOTION_THRESHOLD).astype(np.uint8)
+        motion_area = float(moving.mean())
+        if not motion_area:
+            return [], 0.0
+        moving = cv2.dilate(moving, np.ones((3, 3), np.uint8), iterations=2)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(moving)
+        scale_y = frame.shape[0] / MOTION_FRAME_SIZE[1]
+        scale_x = frame.shape[1] / MOTION_FRAME_SIZE[0]
+        windows = [(int(y * scale_y), int((y + h) * scale_y), int(x * scale_x), int((x + w) * scale_x), 1)
+                   for x, y, w, h, _ in stats[1:count].tolist()]
+        return windows, motion_area
+
+    @staticmethod
+    def _merge_windows(windows):
+        """Combines overlapping (top, bottom, left, right, upsample) windows so no area is searched twice."""
+        merged = []
+        for window in windows:
+            while True:
+                top, bottom, left, right, upsample = window
+                overlapping = next((other for other in merged if other[0] < bottom and top < other[1]
+                                    and other[2] < right and left < other[3]), None)
+                if overlapping is None:
+                    break
+                merged.remove(overlapping)
+                window = (min(top, overlapping[0]), max(bottom, overlapping[1]),
+                          min(left, overlapping[2]), max(right, overlapping[3]), max(upsample, overlapping[4]))
+            merged.append(window)
+        return merged
+
+    @staticmethod
+    def _drop_duplicates(locations):
+        kept = []
+        for location in locations:
+            if all(box_iou(location, other) <= DUPLICATE_IOU_THRESHOLD for other in kept):
+                kept.append(location)
+        return kept
+
+    def _remember(self, locations):
+        """Keeps positions searched for a few passes after their face was last detected."""
+        known = [[location, KNOWN_FACE_PASSES] for location in locations]
+        for location, passes_left in self._known:
+            if passes_left > 1 and all(box_iou(location, found) == 0 for found in locations):
+                known.append([location, passes_left - 1])
+        self._known = known
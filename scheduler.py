@@ -0,0 +1,108 @@
+import time
+from startup import lazy_import
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# --- Constants ---
+MIN_PROCESS_INTERVAL = 2  # Busiest rate: recognise every 2nd frame while people are moving
+MAX_PROCESS_INTERVAL = 30  # Calmest rate: recognise every 30th frame in a still room
+MOTION_FRAME_SIZE = (80, 60)  # Frames are shrunk to this (width, height) before differencing
+STILL_MOTION = 0.005  # Mean absolute difference (0-1) at or below which the scene counts as still
+BUSY_MOTION = 0.03  # Mean absolute difference (0-1) at or above which the scene counts as busy
+SMOOTHING = 0.2  # Weight of the newest sample in the moving averages
+
+
+def _smooth(average, sample):
+    return sample if average is None else average + SMOOTHING * (sample - average)
+
+
+class RecognitionScheduler:
+    """
+    Decides on which frames recognition runs: every `interval`-th frame.
+    """
+    # The fixed schedule never looks at pixels, so skipped frames need not be decoded.
+    needs_every_frame = False
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._frames_since_pass = interval
+
+    def should_process(self, frame):
+        """Returns True if recognition should run on this frame."""
+        if self._frames_since_pass >= self.interval:
+            self._frames_since_pass = 1
+            return True
+        self._frames_since_pass += 1
+        return False
+
+    def record_pass(self, duration, inline=True):
+        """Reports how long a recognition pass took. The fixed schedule ignores it."""
+
+
+class AdaptiveScheduler(RecognitionScheduler):
+    """
+    Adapts the recognition interval to scene motion and to the measured cost of a pass.
+
+    Motion is the mean absolute difference between consecutive thumbnails of the frame.
+    A busy scene pulls the interval towards `min_interval` and a still one lets it back
+    off to `max_interval`. On top of that the interval is stretched as far as needed to
+    keep recognition within `cpu_budget` (fraction of one core) and the loop at `target_fps`.
+    """
+    needs_every_frame = True
+
+    def __init__(self, min_interval=MIN_PROCESS_INTERVAL, max_interval=MAX_PROCESS_INTERVAL,
+                 cpu_budget=None, target_fps=None):
+        super().__init__(min_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cpu_budget = cpu_budget
+        self.target_fps = target_fps
+        self.motion = 0.0
+        self._previous_thumbnail = None
+        self._pass_cost = None
+        self._frame_time = None
+        self._last_frame_at = None
+        self._unaccounted_cost = 0.0
+
+    def should_process(self, frame):
+        now = time.perf_counter()
+        if self._last_frame_at is not None:
+            # Time spent in an inline recognition pass is tracked separately from the per-frame cost.
+            elapsed = max(0.0, now - self._last_frame_at - self._unaccounted_cost)
+            self._frame_time = _smooth(self._frame_time, elapsed)
+        self._last_frame_at = now
+        self._unaccounted_cost = 0.0
+
+        self.motion = self._measure_motion(frame)
+        self.interval = self._choose_interval()
+        return super().should_process(frame)
+
+    def record_pass(self, duration, inline=True):
+        """
+        Args:
+            duration (float): Seconds the recognition pass took.
+            inline (bool): Whether the pass ran on the capture thread and so delayed the next frame.
+        """
+        self._pass_cost = _smooth(self._pass_cost, duration)
+        if inline:
+            self._unaccounted_cost += duration
+
+    def _measure_motion(self, frame):
+        thumbnail = cv2.resize(frame, MOTION_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+        thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY)
+        previous, self._previous_thumbnail = self._previous_thumbnail, thumbnail
+        if previous is None:
+            return 1.0
+        return float(np.mean(cv2.absdiff(thumbnail, previous))) / 255.0
+
+    def _choose_interval(self):
+        activity = min(1.0, max(0.0, (self.motion - STILL_MOTION) / (BUSY_MOTION - STILL_MOTION)))
+        interval = self.max_interval - activity * (self.max_interval - self.min_interval)
+
+        if self._pass_cost is not None and self._frame_time:
+            if self.cpu_budget:
+                interval = max(interval, self._pass_cost / (self.cpu_budget * self._frame_time))
+            if self.target_fps:
+                headroom = 1.0 / self.target_fps - self._frame_time
+                interval = max(interval, self._pass_cost / headroom if headroom > 0 else self.max_interval)
+        return max(1, int(round(interval)))
@@ -0,0 +1,86 @@
+import importlib
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+# Close to process start: every StudyGuard module that defers imports loads this one first.
+_PROCESS_START = time.perf_counter()
+_timings = []
+_timings_lock = threading.Lock()
+
+
+def _record(label, seconds):
+    with _timings_lock:
+        _timings.append((label, seconds))
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a heavy module that imports it on first attribute access.
+
+    Loading is guarded by a lock, so several threads may touch the module at once.
+    Attributes are cached on the stand-in after first use, so later lookups cost the
+    same as on the real module.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self._lazy_lock = threading.Lock()
+        self._lazy_module = None
+
+    def __getattr__(self, attribute):
+        value = getattr(self._load(), attribute)
+        setattr(self, attribute, value)
+        return value
+
+    def _load(self):
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    already_imported = self.__name__ in sys.modules
+                    started_at = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    if not already_imported:
+                        _record(f"import {self.__name__}", time.perf_counter() - started_at)
+                    self._lazy_module = module
+        return self._lazy_module
+
+
+def lazy_import(name):
+    """
+    Returns a module object that only imports `name` when it is first used.
+
+    Used for cv2, numpy, pandas and face_recognition (whose import loads the dlib
+    models), so that `main.py --help` or a report-only run starts instantly.
+    """
+    return _LazyModule(name)
+
+
+def preload_in_background(*modules):
+    """Imports lazily loaded modules on a background thread, so they are ready when first needed."""
+    def load():
+        for module in modules:
+            module._load()
+    thread = threading.Thread(target=load, name='preload', daemon=True)
+    thread.start()
+    return thread
+
+
+@contextmanager
+def timed_phase(label):
+    """Records how long a startup phase takes for the startup report."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(label, time.perf_counter() - started_at)
+
+
+def print_startup_report():
+    """Prints where cold-start time went, from process start to the first frame."""
+    with _timings_lock:
+        timings = list(_timings)
+    print(f"INFO: Startup took {time.perf_counter() - _PROCESS_START:.2f}s. Breakdown (phases may overlap):")
+    for label, seconds in sorted(timings, key=lambda timing: timing[1], reverse=True):
+        print(f"INFO:   {label:<32} {seconds:7.3f}s")
@@ -1,51 +1,210 @@
 
-from datetime import datetime
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from startup import lazy_import
+np = lazy_import('numpy')
+
+# --- Constants ---
+GRACE_PERIOD = 10.0  # Seconds a student may go unseen before their presence interval is closed
+INITIAL_CAPACITY = 64  # Student slots allocated up front; the arrays double when they fill up
 
 class StudentTracker:
     """
     Tracks the state and data for all students.
+
+    Per-student state lives in arrays indexed by a slot assigned on the student's first
+    sighting, with times taken from a monotonic clock. Presence is recorded as intervals:
+    a student who is not seen again within `grace_period` seconds has the interval closed
+    at their last sighting, so only time actually spent in the room is counted. Each
+    recognition pass only touches the students who were seen or whose state changed.
+
+    If a `sink` (see report_sink.ReportSink) is given, every interval start and end and
+    every recorded behavior is also streamed to it as it happens.
     """
-    def __init__(self):
-        self._students = {}
+    def __init__(self, grace_period=GRACE_PERIOD, clock=time.monotonic, sink=None):
+        self.grace_period = grace_period
+        self._sink = sink
+        self.set_clock(clock, datetime.now())
+        self._slots = {}
+        self._roll_nos = []
+        self._metadata = []
+        self._behaviors = []
+        self._first_seen = np.zeros(INITIAL_CAPACITY)
+        self._last_seen = np.zeros(INITIAL_CAPACITY)
+        self._interval_start = np.zeros(INITIAL_CAPACITY)
+        self._accumulated = np.zeros(INITIAL_CAPACITY)
+        # Slots seen in the latest pass, and slots that left but are still within the grace period
+        self._present = set()
+        self._awaiting_exit = OrderedDict()
+        # Incremented whenever the set of present students changes, so displays can skip redrawing
+        self.presence_version = 0
+
+    def set_sink(self, sink):
+        """Streams every later interval start and end and every behavior to `sink`."""
+        self._sink = sink
+
+    def set_clock(self, clock, wall_origin):
+        """
+        Sets the clock used for all timestamps.
+
+        Args:
+            clock (callable): Returns the current time in seconds, e.g. `time.monotonic` or a video position.
+            wall_origin (datetime): The wall-clock time corresponding to the clock's current reading.
+        """
+        self._clock = clock
+        self._clock_origin = clock()
+        self._wall_origin = wall_origin
+
+    def current_time(self):
+        """Returns the tracker's current time as a datetime."""
+        return self._to_datetime(self._clock())
 
     def update_student(self, roll_no, metadata):
         """
         Updates a student's state or logs a new entry.
         """
-        now = datetime.now()
-        if roll_no not in self._students:
+        now = self._clock()
+        slot = self._slots.get(roll_no)
+        if slot is None:
             # New student entry
-            self._students[roll_no] = {
-                'metadata': metadata,
-                'entry_time': now,
-                'last_seen': now,
-                'present': True,
-                'behaviors': set()
-            }
-        else:
-            # Update last seen time for existing student
-            self._students[roll_no]['last_seen'] = now
-            self._students[roll_no]['present'] = True
+            slot = self._add_student(roll_no, metadata)
+            self._first_seen[slot] = now
+            self._start_interval(slot, now)
+        elif slot in self._awaiting_exit:
+            del self._awaiting_exit[slot]
+            if now - self._last_seen[slot] > self.grace_period:
+                # Gone for longer than the grace period, though no pass came in time to close the interval
+                self._end_interval(slot)
+                self._start_interval(slot, now)
+            # Otherwise seen again within the grace period: the presence interval simply continues
+        elif slot not in self._present:
+            # Back after the grace period: a new presence interval starts
+            self._start_interval(slot, now)
+        self._last_seen[slot] = now
+        if slot not in self._present:
+            self._present.add(slot)
+            self.presence_version += 1
 
     def mark_absent(self, roll_nos_in_frame):
         """
         Marks students not in the current frame as 'absent'.
+
+        Their presence interval stays open for the grace period and is closed at the
+        last sighting if they do not come back in time.
         """
-        all_tracked_roll_nos = set(self._students.keys())
-        absent_roll_nos = all_tracked_roll_nos - roll_nos_in_frame
-        for roll_no in absent_roll_nos:
-            self._students[roll_no]['present'] = False
+        seen_slots = {self._slots[roll_no] for roll_no in roll_nos_in_frame if roll_no in self._slots}
+        departed = self._present - seen_slots
+        for slot in departed:
+            self._awaiting_exit[slot] = None
+        if departed:
+            self._present &= seen_slots
+            self.presence_version += 1
+        self._close_expired_intervals(self._clock())
+        if self._sink is not None:
+            self._sink.flush_if_due()
 
     def record_behavior_for_present_students(self, action):
         """
         Adds a behavior to all students currently marked as present.
         """
-        for roll_no, data in self._students.items():
-            if data['present']:
-                data['behaviors'].add(action)
+        timestamp = self.current_time() if self._sink is not None else None
+        for slot in self._present:
+            self._behaviors[slot].add(action)
+            if self._sink is not None:
+                self._sink.emit('behavior', timestamp, roll_no=self._roll_nos[slot], action=action)
+
+    def record_behavior(self, roll_no, action):
+        """
+        Adds a behavior to one student, e.g. the result of per-student behavior inference.
+        """
+        slot = self._slots.get(roll_no)
+        if slot is None:
+            return
+        self._behaviors[slot].add(action)
+        if self._sink is not None:
+            self._sink.emit('behavior', self.current_time(), roll_no=roll_no, action=action)
+
+    def close(self):
+        """
+        Ends the session: closes every open presence interval at the student's last
+        sighting and closes the sink.
+        """
+        for slot in list(self._awaiting_exit) + sorted(self._present):
+            self._end_interval(slot)
+        self._awaiting_exit.clear()
+        self._present.clear()
+        self.presence_version += 1
+        if self._sink is not None:
+            self._sink.close()
+
+    def present_students(self):
+        """
+        Returns (roll_no, metadata) for every present student, in order of first sighting.
+        """
+        return [(self._roll_nos[slot], self._metadata[slot]) for slot in sorted(self._present)]
 
     def get_all_students_data(self):
         """
-        Returns the dictionary containing all tracked student data.
+        Returns a dictionary of all tracked student data keyed by roll number.
+
+        `time_present` is the accumulated time of all presence intervals.
         """
-        return self._students
+        students = {}
+        for roll_no, slot in self._slots.items():
+            students[roll_no] = {
+                'metadata': self._metadata[slot],
+                'entry_time': self._to_datetime(self._first_seen[slot]),
+                'last_seen': self._to_datetime(self._last_seen[slot]),
+                'present': slot in self._present,
+                'time_present': timedelta(seconds=float(self._time_present(slot))),
+                'behaviors': self._behaviors[slot]
+            }
+        return students
+
+    def _add_student(self, roll_no, metadata):
+        slot = len(self._roll_nos)
+        if slot == len(self._first_seen):
+            self._first_seen, self._last_seen, self._interval_start, self._accumulated = (
+                np.concatenate([array, np.zeros_like(array)])
+                for array in (self._first_seen, self._last_seen, self._interval_start, self._accumulated))
+        self._slots[roll_no] = slot
+        self._roll_nos.append(roll_no)
+        self._metadata.append(metadata)
+        self._behaviors.append(set())
+        self._accumulated[slot] = 0.0
+        return slot
+
+    def _close_expired_intervals(self, now):
+        """Closes the intervals of students who have been gone for longer than the grace period."""
+        while self._awaiting_exit:
+            slot = next(iter(self._awaiting_exit))
+            if now - self._last_seen[slot] <= self.grace_period:
+                break
+            del self._awaiting_exit[slot]
+            self._end_interval(slot)
+
+    def _start_interval(self, slot, now):
+        self._interval_start[slot] = now
+        if self._sink is not None:
+            metadata = self._metadata[slot]
+            self._sink.emit('enter', self._to_datetime(now), roll_no=self._roll_nos[slot],
+                            name=str(metadata['name']), elective=str(metadata['elective']))
+
+    def _end_interval(self, slot):
+        """Adds a finished interval, ending at the last sighting, to the student's presence time."""
+        duration = self._last_seen[slot] - self._interval_start[slot]
+        self._accumulated[slot] += duration
+        if self._sink is not None:
+            self._sink.emit('exit', self._to_datetime(self._last_seen[slot]), roll_no=self._roll_nos[slot],
+                            seconds=round(float(duration), 3))
+
+    def _time_present(self, slot):
+        """Closed intervals plus the open one, if any, up to the last sighting."""
+        open_interval = 0.0
+        if slot in self._present or slot in self._awaiting_exit:
+            open_interval = self._last_seen[slot] - self._interval_start[slot]
+        return self._accumulated[slot] + open_interval
+
+    def _to_datetime(self, timestamp):
+        return self._wall_origin + timedelta(seconds=float(timestamp - self._clock_origin))
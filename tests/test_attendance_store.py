@@ -0,0 +1,133 @@
+from datetime import datetime, time, timedelta
+import os
+import pytest
+from attendance_store import AttendanceStore
+from controller import StudyGuardController
+from face_manager import FaceManager
+from report_sink import ReportSink, load_event_log, load_session_details
+from utils import generate_csv_report
+
+
+def _student(roll_no, elective, minutes=50, behaviors=()):
+    return {'metadata': {'roll_no': roll_no, 'name': f"Student {roll_no}", 'elective': elective},
+            'entry_time': datetime(2024, 9, 2, 9, 0), 'time_present': timedelta(minutes=minutes),
+            'behaviors': set(behaviors)}
+
+
+def _day(day):
+    return datetime(2024, 9, day, 10, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with AttendanceStore(str(tmp_path / 'attendance.db')) as store:
+        yield store
+
+
+def test_empty_session_counts_as_held(store):
+    store.record_session('phys_1', _day(2), {'101': _student('101', 'Physics')}, electives=['Physics'])
+    store.record_session('phys_2', _day(3), {}, electives=['Physics'])
+
+    assert store.student_summary() == [('101', 'Student 101', 'Physics', 1, 2, 50.0, 0.83)]
+    assert store.elective_summary() == [('Physics', 2, 1, 0.5, 50.0)]
+
+
+def test_recording_a_session_again_replaces_it(store):
+    store.record_session('phys_1', _day(2), {'101': _student('101', 'Physics'), '102': _student('102', 'Physics')},
+                         electives=['Physics'])
+    store.record_session('phys_1', _day(2), {'101': _student('101', 'Physics', minutes=30)}, electives=['Physics'])
+
+    assert store.student_summary() == [('101', 'Student 101', 'Physics', 1, 1, 100.0, 0.5)]
+    assert store.date_summary() == [('2024-09-02', 1, 1, 1, 0.5)]
+
+
+def test_electives_default_to_those_of_the_attendees(store):
+    store.record_session('mixed', _day(2), {'101': _student('101', 'Physics'), '201': _student('201', 'Biology')})
+
+    assert [row[:5] for row in store.student_summary()] == [('201', 'Student 201', 'Biology', 1, 1),
+                                                           ('101', 'Student 101', 'Physics', 1, 1)]
+
+
+def test_visits_to_other_electives_are_not_attendance(store):
+    store.record_session('phys_1', _day(2), {'101': _student('101', 'Physics'), '201': _student('201', 'Biology')},
+                         electives=['Physics'])
+    store.record_session('bio_1', _day(2), {}, electives=['Biology'])
+
+    visitor = store.student_summary(roll_no='201')
+    assert [row[3:6] for row in visitor] == [(0, 1, 0.0)]
+    assert store.elective_summary(elective='Biology') == [('Biology', 1, 0, 0.0, None)]
+
+
+def test_date_range_limits_sessions_held_and_attended(store):
+    for day in (2, 3, 4):
+        attendees = {'101': _student('101', 'Physics')} if day != 3 else {}
+        store.record_session(f"phys_{day}", _day(day), attendees, electives=['Physics'])
+
+    assert [row[3:6] for row in store.student_summary(since='2024-09-03')] == [(1, 2, 50.0)]
+    assert [row[3:6] for row in store.student_summary(until='2024-09-02')] == [(1, 1, 100.0)]
+    assert [row[0] for row in store.date_summary(since='2024-09-03', until='2024-09-04')] == ['2024-09-04']
+
+
+def test_report_records_sessions_nobody_attended(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = str(tmp_path / 'attendance.db')
+    generate_csv_report({'101': _student('101', 'Physics')}, report_time=_day(2), report_name='a',
+                        attendance_db=db, electives={'Physics'})
+    generate_csv_report({}, report_time=_day(3), report_name='b', attendance_db=db, electives={'Physics'})
+
+    with AttendanceStore(db) as store:
+        assert [row[3:6] for row in store.student_summary()] == [(1, 2, 50.0)]
+
+
+def test_summarized_session_replaces_the_stored_copy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = str(tmp_path / 'attendance.db')
+    sink = ReportSink('s1_2024-09-02_09-00-00.events.jsonl')
+    sink.emit('session', datetime(2024, 9, 2, 9, 0), electives=['Physics'], room='lab')
+    sink.emit('enter', datetime(2024, 9, 2, 9, 1), roll_no='101', name='Student 101', elective='Physics')
+    sink.emit('exit', datetime(2024, 9, 2, 9, 51), roll_no='101', seconds=3000.0)
+    sink.close()
+    student_data = load_event_log(sink.path)
+    generate_csv_report(student_data, report_time=datetime(2024, 9, 2, 9, 52), report_name='s1', attendance_db=db,
+                        electives={'Physics'}, room='lab', session_name='s1_2024-09-02_09-00-00')
+
+    # As `main.py --summarize` does for the same log
+    details = load_session_details(sink.path)
+    generate_csv_report(load_event_log(sink.path), report_time=details['end'], report_name='s1_summary',
+                        attendance_db=db, electives=details['electives'], room=details['room'],
+                        session_name='s1_2024-09-02_09-00-00')
+
+    with AttendanceStore(db) as store:
+        assert [row[3:6] for row in store.student_summary()] == [(1, 1, 100.0)]
+        assert store.date_summary() == [('2024-09-02', 1, 1, 1, 0.83)]
+
+
+class StillCapture:
+    """A capture whose position never moves, enough to anchor the session clock."""
+    def get(self, prop):
+        return 0.0
+
+
+def test_summarize_uses_the_electives_of_the_recording_time(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    recording = tmp_path / 'lecture.mp4'
+    recording.write_bytes(b'')
+    yesterday = datetime.now() - timedelta(days=1)
+    os.utime(recording, (yesterday.timestamp(), yesterday.timestamp()))
+    # Physics is timetabled all day today, at the time of the audit, but nothing was on when it was recorded
+    timetable = [{'room': 'lab', 'days': {datetime.now().weekday()}, 'start': time(0), 'end': time(23, 59, 59),
+                  'elective': 'Physics'}]
+    face_manager = FaceManager.from_encodings([], [])
+    controller = StudyGuardController(str(recording), headless=True, face_manager=face_manager, room='lab',
+                                      timetable=timetable, instrument=False, report_name='lecture')
+    try:
+        controller._open_session_logs()
+        controller._start_video_clock(StillCapture())
+        controller.student_tracker.close()
+    finally:
+        controller.behavior_engine.close()
+
+    assert controller.session_electives is None
+    details = load_session_details(controller.event_log_path)
+    assert details['electives'] is None
+    assert details['room'] == 'lab'
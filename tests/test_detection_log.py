@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from detection_log import DetectionLog, DetectionLogWriter, HEADER_SIZE
+
+
+def _encodings(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, 128)).astype(np.float32)
+
+
+PASSES = [
+    (100.0, [(10, 60, 50, 20), (5, 30, 25, 10)], _encodings(2, seed=1)),
+    (100.5, [], np.zeros((0, 128), dtype=np.float32)),
+    (101.0, [(12, 62, 52, 22)], _encodings(1, seed=2)),
+    (101.5, [], np.zeros((0, 128), dtype=np.float32)),
+]
+
+
+def _write(path, passes, **options):
+    writer = DetectionLogWriter(str(path), source='lecture.mp4', **options)
+    for timestamp, face_locations, face_encodings in passes:
+        writer.record(timestamp, face_locations, face_encodings)
+    writer.close()
+
+
+def _assert_passes(log, passes):
+    replayed = list(log.passes())
+    assert len(log) == len(replayed) == len(passes)
+    for (timestamp, face_locations, face_encodings), expected in zip(replayed, passes):
+        assert timestamp == expected[0]
+        assert face_locations == expected[1]
+        assert face_encodings.shape == (len(expected[1]), 128)
+        np.testing.assert_array_equal(face_encodings, expected[2])
+
+
+@pytest.mark.parametrize('flush_every', [1, 3, 50])
+def test_passes_round_trip_including_passes_without_faces(tmp_path, flush_every):
+    path = tmp_path / 'session.detections'
+    _write(path, PASSES, flush_every=flush_every)
+
+    log = DetectionLog(str(path))
+    assert log.source == 'lecture.mp4'
+    assert (log.start_time, log.end_time) == (100.0, 101.5)
+    _assert_passes(log, PASSES)
+
+
+def test_consecutive_passes_with_one_face_stay_separate(tmp_path):
+    path = tmp_path / 'session.detections'
+    passes = [(float(second), [(1, 2, 3, 0)], _encodings(1, seed=second)) for second in range(5)]
+    _write(path, passes, flush_every=2)
+
+    _assert_passes(DetectionLog(str(path)), passes)
+
+
+def test_partly_written_last_row_is_ignored(tmp_path):
+    path = tmp_path / 'session.detections'
+    _write(path, PASSES)
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 100)
+
+    _assert_passes(DetectionLog(str(path)), PASSES)
+
+
+def test_log_without_passes(tmp_path):
+    path = tmp_path / 'session.detections'
+    _write(path, [])
+
+    log = DetectionLog(str(path))
+    assert len(log) == 0
+    assert list(log.passes()) == []
+    assert log.start_time is None and log.end_time is None
+
+
+def test_header_has_a_fixed_size_even_for_long_sources(tmp_path):
+    path = tmp_path / 'session.detections'
+    writer = DetectionLogWriter(str(path), source='rtsp://' + 'x' * HEADER_SIZE)
+    writer.record(1.0, [], [])
+    writer.close()
+
+    log = DetectionLog(str(path))
+    assert log.source is None
+    assert len(log) == 1
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'other.detections'
+    path.write_bytes(b'{"format": "something-else", "version": 1}'.ljust(HEADER_SIZE))
+
+    with pytest.raises(ValueError):
+        DetectionLog(str(path))
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from face_manager import FaceManager, VISITOR_TOLERANCE_MARGIN
+
+
+def _encodings(count, seed=0):
+    # Random unit vectors are about 1.4 apart, far outside any match tolerance
+    vectors = np.random.default_rng(seed).normal(size=(count, 128))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _nudge(encoding, distance, seed=1):
+    direction = np.random.default_rng(seed).normal(size=128)
+    return (encoding + distance * direction / np.linalg.norm(direction)).astype(np.float32)
+
+
+def _roster(encodings, electives=None, roll_nos=None):
+    electives = electives or ['Physics'] * len(encodings)
+    roll_nos = roll_nos or [str(index) for index in range(len(encodings))]
+    metadata = [{'roll_no': roll_no, 'name': f"Student {roll_no}", 'elective': elective}
+                for roll_no, elective in zip(roll_nos, electives)]
+    return FaceManager.from_encodings(list(encodings), metadata)
+
+
+def _roll_nos(matches):
+    return [metadata['roll_no'] if match_found else None for match_found, metadata in matches]
+
+
+@pytest.fixture
+def encodings():
+    return _encodings(3)
+
+
+def test_each_face_matches_its_nearest_student(encodings):
+    roster = _roster(encodings)
+    faces = [_nudge(encodings[2], 0.1, seed=1), _nudge(encodings[0], 0.2, seed=2)]
+
+    assert _roll_nos(roster.find_matches(faces)) == ['2', '0']
+    assert _roll_nos([roster.find_match(faces[0])]) == ['2']
+
+
+def test_faces_beyond_the_tolerance_are_unknown(encodings):
+    roster = _roster(encodings)
+
+    assert _roll_nos(roster.find_matches([_nudge(encodings[1], 0.5)], tolerance=0.4)) == [None]
+    assert _roll_nos(roster.find_matches([_nudge(encodings[1], 0.5)], tolerance=0.6)) == ['1']
+
+
+def test_two_faces_never_claim_the_same_student(encodings):
+    roster = _roster(encodings)
+    farther, closer = _nudge(encodings[0], 0.3, seed=1), _nudge(encodings[0], 0.1, seed=2)
+
+    assert _roll_nos(roster.find_matches([farther, closer])) == [None, '0']
+
+
+def test_assignment_is_greedy_by_distance():
+    # Face A is nearest to student 0 but also within tolerance of student 1; face B only matches student 0.
+    # Face B's match to student 0 is the closest pair, so A falls back to student 1.
+    student_0, student_1 = np.zeros(128, dtype=np.float32), np.zeros(128, dtype=np.float32)
+    student_1[0] = 0.5
+    face_a, face_b = student_0.copy(), student_0.copy()
+    face_a[0], face_b[0] = 0.2, -0.1
+    roster = _roster([student_0, student_1])
+
+    assert _roll_nos(roster.find_matches([face_a, face_b])) == ['1', '0']
+
+
+def test_excluded_students_are_not_matched(encodings):
+    roster = _roster(encodings)
+
+    assert _roll_nos(roster.find_matches([encodings[1]], exclude_roll_nos={'1'})) == [None]
+    assert _roll_nos(roster.find_matches([encodings[1], encodings[2]], exclude_roll_nos={'2'})) == ['1', None]
+
+
+def test_a_student_with_several_photos_is_matched_once(encodings):
+    roster = _roster([encodings[0], _nudge(encodings[0], 0.1), encodings[1]], roll_nos=['7', '7', '8'])
+
+    assert _roll_nos(roster.find_matches([encodings[0], _nudge(encodings[0], 0.05, seed=3)])) == ['7', None]
+    assert roster.distance_to(_nudge(encodings[0], 0.05, seed=3), '7') == pytest.approx(0.05, abs=1e-4)
+    assert roster.distance_to(encodings[0], 'missing') == float('inf')
+
+
+def test_empty_inputs(encodings):
+    assert _roster(encodings).find_matches([]) == []
+    assert FaceManager.from_encodings([], []).find_matches([encodings[0]]) == [(False, None)]
+
+
+def test_session_roster_prefers_expected_students_and_admits_close_visitors(encodings):
+    roster = _roster(encodings, electives=['Physics', 'Physics', 'Biology'])
+    session = roster.session_roster(['Physics'])
+    close_visitor = _nudge(encodings[2], 0.6 - VISITOR_TOLERANCE_MARGIN - 0.02, seed=1)
+    borderline_visitor = _nudge(encodings[2], 0.6 - VISITOR_TOLERANCE_MARGIN / 2, seed=2)
+
+    assert len(session.expected.known_face_metadata) == 2
+    assert _roll_nos(session.find_matches([encodings[0], close_visitor])) == ['0', '2']
+    assert _roll_nos(session.find_matches([borderline_visitor])) == [None]
+    assert _roll_nos(roster.find_matches([borderline_visitor])) == ['2']
+    assert session.visitor_matches == 1
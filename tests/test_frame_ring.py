@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from frame_ring import FrameRingBuffer
+
+
+def _frame(value, height=4, width=6):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def _values(clip):
+    return [int(frame[0, 0, 0]) for frame in clip]
+
+
+def test_latest_returns_the_last_frames_oldest_first_after_wrapping():
+    buffer = FrameRingBuffer(4)
+    for value in range(10):
+        buffer.append(_frame(value))
+
+    assert len(buffer) == 4
+    assert _values(buffer.latest()) == [6, 7, 8, 9]
+    assert _values(buffer.latest(2)) == [8, 9]
+    assert _values(buffer.latest(10)) == [6, 7, 8, 9]
+
+
+@pytest.mark.parametrize('appended', [1, 3, 4, 5, 7])
+def test_latest_is_a_read_only_view_without_copying(appended):
+    buffer = FrameRingBuffer(4)
+    for value in range(appended):
+        buffer.append(_frame(value))
+
+    clip = buffer.latest()
+    assert np.shares_memory(clip, buffer._storage)
+    assert clip.flags.c_contiguous
+    assert not clip.flags.writeable
+    assert _values(clip) == list(range(max(0, appended - 4), appended))
+
+
+def test_stride_keeps_every_nth_frame_and_skipped_frames_keep_it_aligned():
+    buffer = FrameRingBuffer(8, stride=3)
+    for value in range(10):
+        if buffer.wants_next():
+            buffer.append(_frame(value))
+        else:
+            buffer.skip()
+
+    assert _values(buffer.latest()) == [0, 3, 6, 9]
+
+
+def test_frames_are_resized_to_the_frame_size():
+    buffer = FrameRingBuffer(2, frame_size=(3, 2))
+    buffer.append(_frame(5, height=8, width=12))
+
+    assert buffer.latest().shape == (1, 2, 3, 3)
+    assert _values(buffer.latest()) == [5]
+
+
+def test_clear_forgets_frames_but_keeps_the_storage():
+    buffer = FrameRingBuffer(3, stride=2)
+    for value in range(5):
+        buffer.append(_frame(value))
+    storage = buffer._storage
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.latest().shape[0] == 0
+    assert buffer.wants_next()
+    buffer.append(_frame(42))
+    assert buffer._storage is storage
+    assert _values(buffer.latest()) == [42]
@@ -0,0 +1,128 @@
+from datetime import datetime, time
+import numpy as np
+import pytest
+from controller import StudyGuardController
+from face_manager import FaceManager
+from recognition_cache import CachedRoster, RecognitionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _encodings(count, seed=0):
+    # Random unit vectors are about 1.4 apart, far outside any match tolerance
+    vectors = np.random.default_rng(seed).normal(size=(count, 128))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _nudge(encoding, distance, seed=1):
+    direction = np.random.default_rng(seed).normal(size=128)
+    return (encoding + distance * direction / np.linalg.norm(direction)).astype(np.float32)
+
+
+def _roster(encodings, electives=None):
+    electives = electives or ['Physics'] * len(encodings)
+    metadata = [{'roll_no': str(index), 'name': f"Student {index}", 'elective': elective}
+                for index, elective in enumerate(electives)]
+    return FaceManager.from_encodings(list(encodings), metadata)
+
+
+def _roll_nos(matches):
+    return [metadata['roll_no'] if match_found else None for match_found, metadata in matches]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_unknown_caused_by_an_excluded_student_is_not_reused(clock):
+    encodings = _encodings(4)
+    roster = CachedRoster(_roster(encodings), RecognitionCache(clock=clock))
+
+    assert _roll_nos(roster.find_matches([encodings[3]], exclude_roll_nos={'3'})) == [None]
+    assert _roll_nos(roster.find_matches([_nudge(encodings[3], 0.05)])) == ['3']
+
+
+def test_unknown_caused_by_a_claim_in_the_same_frame_is_not_reused(clock):
+    encodings = _encodings(2)
+    roster = CachedRoster(_roster(encodings), RecognitionCache(clock=clock))
+    closer, farther = _nudge(encodings[0], 0.1, seed=1), _nudge(encodings[0], 0.3, seed=2)
+
+    assert _roll_nos(roster.find_matches([farther, closer])) == [None, '0']
+    assert _roll_nos(roster.find_matches([_nudge(farther, 0.02, seed=3)])) == ['0']
+
+
+def test_decisions_made_without_claims_are_reused(clock):
+    encodings = _encodings(3)
+    cache = RecognitionCache(clock=clock)
+    roster = CachedRoster(_roster(encodings), cache)
+    stranger = _encodings(1, seed=7)[0]
+
+    assert _roll_nos(roster.find_matches([encodings[1], stranger])) == ['1', None]
+    assert _roll_nos(roster.find_matches([_nudge(encodings[1], 0.05), _nudge(stranger, 0.05)])) == ['1', None]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_cached_match_for_a_claimed_student_is_decided_again(clock):
+    encodings = _encodings(2)
+    roster = CachedRoster(_roster(encodings), RecognitionCache(clock=clock))
+    roster.find_matches([encodings[0]])
+
+    assert _roll_nos(roster.find_matches([_nudge(encodings[0], 0.05)], exclude_roll_nos={'0'})) == [None]
+
+
+def test_reused_match_stays_within_tolerance(clock):
+    encodings = _encodings(1)
+    cache = RecognitionCache(clock=clock)
+    cached = _nudge(encodings[0], 0.5, seed=1)
+    cache.store(cached, (True, {'roll_no': '0'}), match_distance=0.5)
+
+    assert cache.lookup([_nudge(cached, 0.05, seed=2)], tolerance=0.6) != [None]
+    assert cache.lookup([_nudge(cached, 0.2, seed=3)], tolerance=0.6) == [None]
+
+
+def test_entries_expire_after_the_ttl(clock):
+    encoding = _encodings(1)[0]
+    cache = RecognitionCache(ttl=30.0, clock=clock)
+    cache.store(encoding, (False, None))
+
+    clock.now = 29.0
+    assert cache.lookup([encoding]) == [(False, None)]
+    clock.now = 30.0
+    assert cache.lookup([encoding]) == [None]
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    first, second, third = _encodings(3)
+    cache = RecognitionCache(capacity=2, clock=clock)
+    cache.store(first, (True, {'roll_no': 'first'}))
+    cache.store(second, (True, {'roll_no': 'second'}))
+    cache.lookup([first])
+    cache.store(third, (True, {'roll_no': 'third'}))
+
+    assert _roll_nos(cache.lookup([first, third])) == ['first', 'third']
+    assert cache.lookup([second]) == [None]
+
+
+def test_cache_is_cleared_when_the_roster_changes():
+    encodings = _encodings(2)
+    timetable = [{'room': 'lab', 'days': set(range(7)), 'start': time(9), 'end': time(10), 'elective': 'Physics'},
+                 {'room': 'lab', 'days': set(range(7)), 'start': time(10), 'end': time(11), 'elective': 'Chemistry'}]
+    controller = StudyGuardController('lecture.mp4', face_manager=_roster(encodings, ['Physics', 'Chemistry']),
+                                      room='lab', timetable=timetable, instrument=False, event_log=False)
+    try:
+        controller._select_roster(when=datetime(2024, 9, 2, 9, 30))
+        controller.roster.find_matches([encodings[0]])
+        assert len(controller.recognition_cache) == 1
+
+        controller._select_roster(when=datetime(2024, 9, 2, 10, 30))
+        assert len(controller.recognition_cache) == 0
+    finally:
+        controller.behavior_engine.close()
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+import pytest
+from student_tracker import StudentTracker
+
+STUDENT = {'roll_no': '101', 'name': 'Student 101', 'elective': 'Physics'}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, timestamp, **fields):
+        self.events.append((event, timestamp, fields))
+
+    def flush_if_due(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def tracker(clock):
+    tracker = StudentTracker(grace_period=10.0, clock=clock)
+    tracker.set_clock(clock, datetime(2024, 9, 2, 9, 0))
+    return tracker
+
+
+def _seen(tracker, clock, *times):
+    for now in times:
+        clock.now = now
+        tracker.update_student('101', STUDENT)
+        tracker.mark_absent({'101'})
+
+
+def _unseen(tracker, clock, *times):
+    for now in times:
+        clock.now = now
+        tracker.mark_absent(set())
+
+
+def _time_present(tracker):
+    return tracker.get_all_students_data()['101']['time_present']
+
+
+def test_return_within_the_grace_period_continues_the_interval(tracker, clock):
+    _seen(tracker, clock, 0, 5)
+    _unseen(tracker, clock, 6, 12)
+    _seen(tracker, clock, 14, 20)
+
+    assert _time_present(tracker) == timedelta(seconds=20)
+    tracker.close()
+    assert _time_present(tracker) == timedelta(seconds=20)
+
+
+def test_interval_is_closed_at_the_last_sighting_once_the_grace_period_expires(tracker, clock):
+    _seen(tracker, clock, 0, 5)
+    _unseen(tracker, clock, 6, 16)
+
+    assert _time_present(tracker) == timedelta(seconds=5)
+    assert tracker.present_students() == []
+
+
+def test_intervals_accumulate(tracker, clock):
+    _seen(tracker, clock, 0, 5)
+    _unseen(tracker, clock, 6, 16)
+    _seen(tracker, clock, 30, 38)
+    tracker.close()
+
+    data = tracker.get_all_students_data()['101']
+    assert data['time_present'] == timedelta(seconds=13)
+    assert data['entry_time'] == datetime(2024, 9, 2, 9, 0)
+    assert data['last_seen'] == datetime(2024, 9, 2, 9, 0, 38)
+
+
+def test_return_after_the_grace_period_without_a_pass_in_between_starts_a_new_interval(clock):
+    sink = ListSink()
+    tracker = StudentTracker(grace_period=10.0, clock=clock, sink=sink)
+    tracker.set_clock(clock, datetime(2024, 9, 2, 9, 0))
+    _seen(tracker, clock, 0, 1, 2, 3, 4, 5)
+    _unseen(tracker, clock, 6)
+    _seen(tracker, clock, 40, 41)
+    tracker.close()
+
+    assert _time_present(tracker) == timedelta(seconds=6)
+    assert [(event, timestamp.second, fields.get('seconds')) for event, timestamp, fields in sink.events] == [
+        ('enter', 0, None), ('exit', 5, 5.0), ('enter', 40, None), ('exit', 41, 1.0)]
+
+
+def test_behaviors_are_recorded_for_present_students_only(tracker, clock):
+    other = {'roll_no': '102', 'name': 'Student 102', 'elective': 'Physics'}
+    tracker.update_student('101', STUDENT)
+    tracker.update_student('102', other)
+    tracker.mark_absent({'101'})
+    tracker.record_behavior_for_present_students('writing')
+
+    students = tracker.get_all_students_data()
+    assert students['101']['behaviors'] == {'writing'}
+    assert students['102']['behaviors'] == set()
@@ -0,0 +1,47 @@
+import csv
+import os
+from datetime import datetime, time
+
+# --- Constants ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+TIMETABLE_CSV = os.path.join(script_dir, 'timetable.csv')
+DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def load_timetable(path=TIMETABLE_CSV):
+    """
+    Reads the class timetable, a CSV file with `room`, `day`, `start`, `end` and `elective`
+    columns, e.g. `lab,Mon,09:00,10:30,Physics`. `day` may be a day name, an abbreviation
+    or `*` for every day. A slot shared by several electives has one row per elective.
+
+    Returns:
+        list: One dict per row with 'room', 'days' (weekday numbers), 'start', 'end' (times) and 'elective'.
+    """
+    slots = []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                day = row['day'].strip().lower()
+                days = set(range(7)) if day == '*' else {DAY_NAMES.index(day[:3])}
+                slots.append({
+                    'room': row['room'].strip(),
+                    'days': days,
+                    'start': time.fromisoformat(row['start'].strip()),
+                    'end': time.fromisoformat(row['end'].strip()),
+                    'elective': row['elective'].strip(),
+                })
+            except (KeyError, ValueError, AttributeError):
+                print(f"WARNING: Skipping invalid timetable row {line_number} in {path}.")
+    return slots
+
+
+def expected_electives(timetable, room, when=None):
+    """
+    Returns the electives scheduled in a room at a given time (default: now).
+
+    Returns:
+        set: Elective names; empty if nothing is scheduled.
+    """
+    when = when or datetime.now()
+    return {slot['elective'] for slot in timetable
+            if slot['room'] == room and when.weekday() in slot['days'] and slot['start'] <= when.time() < slot['end']}
@@ -1,23 +1,31 @@
 
-import pandas as pd
 from datetime import datetime, timedelta
+from startup import lazy_import
+from attendance_store import record_session
+pd = lazy_import('pandas')
 
-def generate_csv_report(student_data):
+def generate_csv_report(student_data, report_time=None, report_name='attendance_report', attendance_db=None,
+                        electives=None, room=None, session_name=None):
     """
     Generates the final CSV attendance and behavior report.
     
     Args:
         student_data (dict): The dictionary of tracked student data.
+        report_time (datetime): End of the session; defaults to the current time.
+        report_name (str): File name prefix of the report.
+        attendance_db (str): Attendance store the session is also added to; None writes only the CSV.
+        electives (iterable): Electives expected in the session, recorded in the attendance store.
+        room (str): Room of the session, recorded in the attendance store.
+        session_name (str): Name of the session in the attendance store; defaults to the report file name.
     """
     report_data = []
-    current_time = datetime.now()
+    current_time = report_time or datetime.now()
     
     print("INFO: Generating final report...")
 
     for roll_no, data in student_data.items():
         entry_time = data['entry_time']
-        duration = current_time - entry_time
-        duration_str = str(timedelta(seconds=round(duration.total_seconds())))
+        duration_str = str(timedelta(seconds=round(data['time_present'].total_seconds())))
 
         report_data.append({
             'roll_no': roll_no,
@@ -29,14 +37,41 @@ def generate_csv_report(student_data):
             'behavior': ', '.join(sorted(list(data['behaviors']))) if data['behaviors'] else 'N/A'
         })
     
+    report_stem = f"{report_name}_{current_time.strftime('%Y-%m-%d_%H-%M-%S')}"
+    # A session nobody attended still counts as held for its electives
+    if attendance_db:
+        record_session(attendance_db, session_name or report_stem, current_time, student_data,
+                       electives=electives, room=room)
+
     if not report_data:
         print("WARNING: No student data was tracked. Report will be empty.")
         return
 
     report_df = pd.DataFrame(report_data)
-    report_filename = f"attendance_report_{current_time.strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+    report_filename = f"{report_stem}.csv"
     try:
         report_df.to_csv(report_filename, index=False)
         print(f"SUCCESS: Report generated successfully: {report_filename}")
     except Exception as e:
         print(f"ERROR: Could not save report file: {e}")
+
+def box_iou(box_a, box_b):
+    """
+    Computes the intersection-over-union of two face boxes.
+
+    Args:
+        box_a, box_b (tuple): Boxes in face_recognition's (top, right, bottom, left) order.
+
+    Returns:
+        float: The overlap ratio between 0.0 and 1.0.
+    """
+    top = max(box_a[0], box_b[0])
+    right = min(box_a[1], box_b[1])
+    bottom = min(box_a[2], box_b[2])
+    left = max(box_a[3], box_b[3])
+    intersection = max(0, bottom - top) * max(0, right - left)
+    if intersection == 0:
+        return 0.0
+    area_a = (box_a[2] - box_a[0]) * (box_a[1] - box_a[3])
+    area_b = (box_b[2] - box_b[0]) * (box_b[1] - box_b[3])
+    return intersection / float(area_a + area_b - intersection)